@@ -0,0 +1,76 @@
+from MinimaxAttempt import Minimax, SearchTimeout
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BackgroundSearch:
+    """ Finds a move for the current position of a game on a background thread, so whatever started it (such as the GUI's event loop) is free to carry on and check back with done() and result(). The search works on a copy of the game, so the original can be drawn or changed while it runs, and it can be cancelled at any point.
+    """
+    EXECUTOR = None #A single shared search thread, created on first use, so searches run one at a time.
+
+    def __init__(self, game, max_depth, time_limit = None, book = None, cache = None, table = None):
+        """ Copies the game and starts searching it.
+
+        Args:
+            game (object): The Connect4 object to find a move for
+            max_depth (int): The depth to search to, if there is no time limit
+            time_limit (int): The time allowed in milliseconds for an iterative deepening search, or None to search to max_depth
+            book (object): An OpeningBook to play from when it has the position, or None
+            cache (object): A SearchCache to reuse earlier results from and store this one in, or None
+            table (object): A TranspositionTable to search with, such as one filled by earlier searches of the same game, or None for a new one
+        """
+        self.game = game.copy()
+        self.minimax = Minimax(self.game, table)
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.book = book
+        self.cache = cache
+        self.future = BackgroundSearch.executor().submit(self.run)
+
+    @staticmethod
+    def executor():
+        """ Returns the search thread, creating it on first use. Anything else that searches in the background, such as a Ponder, runs on it too, so only one search uses a transposition table at a time.
+
+        Returns:
+            object: The ThreadPoolExecutor of the search thread
+        """
+        if BackgroundSearch.EXECUTOR is None:
+            BackgroundSearch.EXECUTOR = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = 'search')
+        return BackgroundSearch.EXECUTOR
+
+    def run(self):
+        """ Searches the copied game. Runs on the search thread.
+
+        Returns:
+            int: The best move found, or None if the search was cancelled
+        """
+        try:
+            self.minimax.search(self.max_depth if self.time_limit is None else None, self.time_limit, self.book, self.cache)
+        except SearchTimeout:   #Cancelled part way through an untimed search.
+            return None
+        if self.minimax.cancelled:
+            return None
+        return self.minimax.best_move
+
+    def cancel(self):
+        """ Cancels the search, whether it has started or not. result() will then return None.
+        """
+        self.future.cancel()
+        self.minimax.cancel()
+
+    def done(self):
+        """ Returns True once the search has finished or been cancelled.
+
+        Returns:
+            boolean: Whether a result is ready
+        """
+        return self.future.done()
+
+    def result(self):
+        """ Returns the move found, waiting for the search to finish if it hasn't.
+
+        Returns:
+            int: The best move found, or None if the search was cancelled
+        """
+        if self.future.cancelled():
+            return None
+        return self.future.result()
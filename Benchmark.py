@@ -0,0 +1,819 @@
+from Connect4 import Connect4
+from GameServer import GameServer, GameClient, percentile
+from MCTS import MCTS
+from MinimaxAttempt import Minimax
+from MoveOrdering import MoveOrdering
+from Ponder import Ponder
+from Solver import Solver
+from Tournament import Tournament
+from time import perf_counter, sleep
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tracemalloc
+
+POSITIONS = {   #Named positions, each given as the columns played from an empty 7x6 grid.
+    'opening': [],
+    'early': [3, 3, 2, 4],
+    'middle': [3, 3, 2, 4, 4, 2, 1, 5, 3, 3, 5, 2],
+}
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+REGRESSION_DEPTHS = range(4, 9)  #The depths of the searches timed by the regression suite.
+
+SOLVER_POSITIONS = {    #Positions with their exact scores for the player to move, as the columns played numbered from 1. Every score was checked against the best of the scores of the moves from the position, solved separately, and the first two end scores by exhaustive search.
+    'end': [('2211373673547711646447361422', 2), ('7323457736165724447612175161', 1), ('12546366655525513162742711', -2), ('167255212561211657525137477', -1), ('42632753355133664423722777', 0), ('565256355733124516377467436', -2)],
+    'middle': [('4477177245677456461', 11), ('3223617657744456334744', 0), ('7737726715311722226', 1), ('762223616252463424', 5), ('444336722557645666576', 0), ('5224723555257633142536', -3)],
+    'begin': [('746427337247', -6), ('54634636137576', -11), ('225333435342', -9), ('45252263214664', 1), ('1647122476746', 3), ('264673773267', 3)],
+}
+
+
+def setup(moves, cols=7, rows=6):
+    """ Returns a new game with the given moves already played.
+
+    Args:
+        moves (array): The columns to play, in order, from an empty grid
+        cols (int): The number of columns in the grid
+        rows (int): The number of rows in the grid
+
+    Returns:
+        object: A Connect4 object in the position reached by the moves
+    """
+    game = Connect4(cols, rows)
+    for move in moves:
+        game.make_move(move)
+    return game
+
+
+def perft(game, depth):
+    """ Returns the number of positions in the game tree below the current position, stopping at finished games. This is the number of nodes the full-width Minimax visits at the same depth.
+
+    Args:
+        game (object): The Connect4 object to explore; it is returned to its original position afterwards
+        depth (int): How many moves deep to explore
+
+    Returns:
+        int: The number of positions visited, including the current one
+    """
+    if depth == 0 or game.game_over():
+        return 1
+    nodes = 1
+    for i in range(game.COLS):
+        if game.valid_move(i):
+            game.make_move(i)
+            nodes += perft(game, depth-1)
+            game.undo_move(i)
+    return nodes
+
+
+def bench_moves(moves, depth):
+    """ Times make_move and undo_move by walking the whole game tree to a depth.
+
+    Args:
+        moves (array): The columns played to reach the starting position
+        depth (int): How many moves deep to explore
+
+    Returns:
+        tuple: The number of nodes visited and the nodes visited per second
+    """
+    game = setup(moves)
+    start = perf_counter()
+    nodes = perft(game, depth)
+    elapsed = perf_counter() - start
+    return nodes, nodes / elapsed
+
+
+def bench_checkwin(moves, repeats=100000):
+    """ Times a full-board checkwin against the win check made by make_move, which only looks at the lines through the last counter.
+
+    Args:
+        moves (array): The columns played to reach the position being checked; must contain at least one move
+        repeats (int): How many times to run each check
+
+    Returns:
+        tuple: Checks per second for the full scan and for the incremental check
+    """
+    game = setup(moves)
+    cell = moves[-1]*game.H1 + game.tot[moves[-1]] - 1
+    board = game.bitboards[game.grid[game.tot[moves[-1]] - 1][moves[-1]]]
+    start = perf_counter()
+    for i in range(repeats):
+        game.checkwin()
+    full = repeats / (perf_counter() - start)
+    start = perf_counter()
+    for i in range(repeats):
+        game.line_win(cell, board)
+    incremental = repeats / (perf_counter() - start)
+    return full, incremental
+
+
+def bench_valid_move(moves, repeats=100000):
+    """ Times valid_move, checking every column of a position.
+
+    Args:
+        moves (array): The columns played to reach the position being checked
+        repeats (int): How many times to check every column
+
+    Returns:
+        double: Checks per second
+    """
+    game = setup(moves)
+    columns = range(game.COLS)
+    start = perf_counter()
+    for i in range(repeats):
+        for col in columns:
+            game.valid_move(col)
+    return repeats * game.COLS / (perf_counter() - start)
+
+
+def bench_evaluation(moves, depth):
+    """ Times evaluation, scoring every position at a depth below a starting position one grid at a time. The search itself no longer calls it, reading the scores the game keeps up to date instead, but it is the reference those scores must match.
+
+    Args:
+        moves (array): The columns played to reach the starting position
+        depth (int): How many moves below the starting position the scored positions are
+
+    Returns:
+        double: Positions scored per second
+    """
+    game = setup(moves)
+    minimax = Minimax(game)
+    grids = []
+    def collect(depth):
+        if depth == 0:
+            grids.append([row[:] for row in game.grid])
+            return
+        for i in range(game.COLS):
+            if game.valid_move(i):
+                game.make_move(i)
+                collect(depth-1)
+                game.undo_move(i)
+    collect(depth)
+    start = perf_counter()
+    for grid in grids:
+        minimax.evaluation(grid, game.P1)
+    return len(grids) / (perf_counter() - start)
+
+
+def bench_search(moves, depth, threats = False):
+    """ Times a Minimax search from a position, reporting nodes per second and how much of the full game tree was pruned.
+
+    Args:
+        moves (array): The columns played to reach the position being searched
+        depth (int): The maximum depth of the search
+        threats (boolean): Whether the search also scores open twos and threes
+
+    Returns:
+        tuple: The move chosen, the number of nodes visited, the nodes visited per second and the fraction of the full tree pruned
+    """
+    game = setup(moves)
+    full_nodes = perft(setup(moves), depth)
+    minimax = Minimax(game, threats = threats)
+    start = perf_counter()
+    minimax.minimax(0, depth, game.turn)
+    elapsed = perf_counter() - start
+    return minimax.best_move, minimax.nodes, minimax.nodes / elapsed, 1 - minimax.nodes / full_nodes
+
+
+def bench_parallel(moves, depth, workers):
+    """ Times a root-parallel search from a position using a pool of worker processes, and checks it chooses the same move as the single process search. The pool is started before timing, as it would be reused across moves.
+
+    Args:
+        moves (array): The columns played to reach the position being searched
+        depth (int): The maximum depth of the search
+        workers (int): The number of worker processes
+
+    Returns:
+        tuple: The time taken in seconds, the number of nodes visited, and whether the move matched the single process search
+    """
+    serial = Minimax(setup(moves))
+    serial.minimax(0, depth, serial.game.turn)
+    with ProcessPoolExecutor(workers) as pool:
+        pool.submit(int).result()   #Starts the workers.
+        minimax = Minimax(setup(moves))
+        start = perf_counter()
+        minimax.parallel_search(depth, pool)
+        elapsed = perf_counter() - start
+    return elapsed, minimax.nodes, minimax.best_move == serial.best_move
+
+
+def bench_mcts(moves, playouts, workers = 1):
+    """ Times an MCTS search of a number of playouts from a position, in one process or with a separate tree in each of a pool of worker processes (see MCTS.parallel_search). The pool is started before timing, as it would be reused across moves.
+
+    Args:
+        moves (array): The columns played to reach the position being searched
+        playouts (int): The playouts to run, in each process
+        workers (int): The number of worker processes; 1 searches in this process
+
+    Returns:
+        tuple: The playouts run per second, the move chosen and the deepest position added to the tree
+    """
+    mcts = MCTS(setup(moves), seed = 0)
+    if workers == 1:
+        mcts.search(playouts)
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            pool.submit(int).result()   #Starts the workers.
+            mcts.parallel_search(playouts, executor = pool, workers = workers)
+    return mcts.stats.playouts_per_second(), mcts.best_move, mcts.stats.depth
+
+
+def bench_mcts_reuse(milliseconds):
+    """ Plays an MCTS against itself for a game, with a time limit per move, and counts the playouts each search started with from the tree of the searches before.
+
+    Args:
+        milliseconds (int): The time allowed per move
+
+    Returns:
+        tuple: The playouts run in total, and the playouts reused in total
+    """
+    game = setup([])
+    engines = {Connect4.P1: MCTS(game, seed = 1), Connect4.P2: MCTS(game, seed = 2)}
+    run = reused = 0
+    while not game.game_over():
+        mcts = engines[game.turn]
+        mcts.search(time_limit = milliseconds)
+        run += mcts.stats.playouts
+        reused += mcts.stats.reused_playouts
+        game.make_move(mcts.best_move)
+    return run, reused
+
+
+def mcts_report(milliseconds, games, workers):
+    """ Prints the playouts per second of MCTS from each named position, in one process and root-parallel, how much of the tree is reused between moves, and its strength against Minimax iterative deepening given the same time per move, played as a Tournament.
+
+    Args:
+        milliseconds (int): The time per move for both agents in the strength games
+        games (int): The number of strength games
+        workers (int): The largest number of worker processes for the parallel searches, and the processes the games are spread over
+    """
+    print(f'{"position":<10}{"workers":<9}{"playouts/sec":>14}{"move":>6}{"depth":>7}')
+    for name, moves in POSITIONS.items():
+        for count in sorted({1, workers}):
+            rate, move, depth = bench_mcts(moves, 5000, count)
+            print(f'{name:<10}{count:<9}{rate:>14.0f}{move:>6}{depth:>7}')
+    run, reused = bench_mcts_reuse(milliseconds)
+    print(f'tree reuse ({milliseconds}ms per move, self-play): {reused} of {run + reused} playouts ({reused / (run + reused):.1%}) carried over from earlier moves')
+    tournament = Tournament(f'mcts:{milliseconds}', f'timed:{milliseconds}', games, workers)
+    summary = tournament.run()
+    agent = summary['score']['agent']
+    low, high = summary['score']['interval']
+    print(f'{agent} against timed:{milliseconds} over {summary["games"]} games: {summary[agent]["count"]} wins, {summary["draws"]["count"]} draws, score {summary["score"]["value"]:.3f} (95% CI {low:.3f} - {high:.3f})')
+
+
+def bench_ponder(games, depth, think_time, opponent_depth = 4):
+    """ Plays games between a Minimax that ponders and an opponent standing in for a player, who takes think_time over every move while the Minimax ponders in the background. Each of the Minimax's moves is timed from the opponent's move to the reply, as the player would see it, alongside a fresh search of the same position without pondering, which also shows whether pondering changed the move. Each game starts with two random moves, seeded by its number, so the games differ.
+
+    Args:
+        games (int): The number of games to play
+        depth (int): The depth the Minimax searches to
+        think_time (double): The seconds the opponent takes over each move
+        opponent_depth (int): The depth of the opponent's own search
+
+    Returns:
+        dict: The ponder hit rate, the mean seconds the Minimax took to reply with and without pondering, and the share of replies that matched the fresh search
+    """
+    ponder = Ponder()
+    pondered = plain = 0.0
+    replies = same = 0
+    for index in range(games):
+        rng = random.Random(index)
+        game = setup([rng.randrange(7), rng.randrange(7)])
+        while not game.game_over():
+            opponent = Minimax(game)
+            opponent.search(opponent_depth)
+            ponder.start(game, depth)
+            sleep(think_time)
+            game.make_move(opponent.best_move if game.valid_move(opponent.best_move) else opponent.order_moves()[0])
+            if game.game_over():
+                ponder.stop()
+                break
+            fresh = Minimax(game.copy())
+            start = perf_counter()
+            fresh.search(depth)
+            plain += perf_counter() - start
+            start = perf_counter()
+            move = ponder.take(game, depth)
+            if move is None:
+                minimax = Minimax(game, ponder.table)
+                move = minimax.search(depth)
+            pondered += perf_counter() - start
+            replies += 1
+            same += move == fresh.best_move
+            game.make_move(move if game.valid_move(move) else fresh.best_move)
+    return {'hit_rate': ponder.hit_rate(), 'pondered': pondered / replies, 'plain': plain / replies, 'same': same / replies}
+
+
+def bench_render(games):
+    """ Times drawing every move of random games on a real canvas, both by rebuilding the whole canvas each move, as the GUI used to, and by recolouring only the space that changed (see BoardRenderer). Each frame is timed up to the canvas being repainted. Needs a display.
+
+    Args:
+        games (int): The number of random games to draw
+
+    Returns:
+        tuple: The mean milliseconds per move rebuilding the canvas, and recolouring only changes
+    """
+    import tkinter
+    from Connect4GUI import App, BoardRenderer
+    root = tkinter.Tk()
+    boards = {}
+    for kind in ('full', 'incremental'):    #A canvas each, so each draws every move from the frame before.
+        canvas = tkinter.Canvas(root, width = App.CANVAS_WIDTH, height = App.CANVAS_HEIGHT)
+        canvas.pack()
+        boards[kind] = BoardRenderer(canvas, App.CANVAS_WIDTH, App.CANVAS_HEIGHT)
+    totals = {'full': 0.0, 'incremental': 0.0}
+    moves = 0
+    rng = random.Random(0)
+    for index in range(games):
+        game = Connect4(7, 6)
+        while not game.game_over():
+            game.make_move(rng.choice([col for col in range(game.COLS) if game.valid_move(col)]))
+            moves += 1
+            for kind, draw in (('full', boards['full'].redraw), ('incremental', boards['incremental'].draw)):
+                start = perf_counter()
+                draw(game)
+                boards[kind].canvas.update_idletasks()
+                totals[kind] += perf_counter() - start
+    root.destroy()
+    return totals['full'] / moves * 1000, totals['incremental'] / moves * 1000
+
+
+def bench_import(module, runs = 10):
+    """ Times importing a module in a fresh interpreter, less the time the interpreter takes to start with no imports, as a worker process or command line tool would pay it. The fastest of a number of runs is taken, as the others only add noise from the rest of the machine. Run python -m compileall first, or compiling the modules is timed too.
+
+    Args:
+        module (string): The module to import, e.g. engine or MinimaxAttempt
+        runs (int): The number of interpreters to start
+
+    Returns:
+        double: The milliseconds the import adds to starting an interpreter
+    """
+    def fastest(code):
+        times = []
+        for run in range(runs):
+            start = perf_counter()
+            subprocess.run([sys.executable, '-c', code], check = True, cwd = os.path.dirname(os.path.abspath(__file__)))
+            times.append(perf_counter() - start)
+        return min(times)
+    return (fastest(f'import {module}') - fastest('pass')) * 1000
+
+
+WORKER_SCRIPT = """
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from time import perf_counter
+import multiprocessing
+import sys
+from engine import Connect4
+from MinimaxAttempt import search_root_move
+context = multiprocessing.get_context(sys.argv[1])
+for task in (partial(int), partial(int), partial(search_root_move, Connect4(7, 6).to_bytes(), 2, 1, False, 3)):
+    start = perf_counter()
+    with ProcessPoolExecutor(1, mp_context = context) as pool:
+        pool.submit(task).result()
+        print(perf_counter() - start)
+"""    #Run in its own interpreter, so spawned workers re-import a bare script, as they would a command line tool's, rather than this module and everything it imports. The first pool also starts multiprocessing's resource tracker, so its time is left out.
+
+
+def bench_worker(method, runs = 5):
+    """ Times starting a pool worker process and getting back the result of a small root move search from it, as parallel_search would with a new pool, against a worker that only returns int(). The difference is what the engine adds to starting a worker: under fork the worker is a copy of the parent, which has already imported the engine; under spawn it is a new interpreter that imports only the engine modules the search needs.
+
+    Args:
+        method (string): The way workers are started: fork or spawn
+        runs (int): The number of pools of each kind to start; the fastest is taken
+
+    Returns:
+        tuple: The milliseconds from creating the pool to the first result, for the bare worker and for the search
+    """
+    bare = []
+    search = []
+    for run in range(runs):
+        output = subprocess.run([sys.executable, '-c', WORKER_SCRIPT, method], check = True, capture_output = True, text = True, cwd = os.path.dirname(os.path.abspath(__file__)))
+        times = output.stdout.split()
+        bare.append(float(times[1]))
+        search.append(float(times[2]))
+    return min(bare) * 1000, min(search) * 1000
+
+
+def bench_server(sessions, seconds, budget, workers = None, max_queue = None, connections = 50):
+    """ Load tests a GameServer: many sessions at once, shared between a number of TCP connections, each play random moves as fast as the server answers them for a number of seconds, starting a new game whenever one ends. A move turned away as busy is sent again after a random backoff, up to twice as long with each refusal (exponential backoff with jitter), and its latency runs from the first attempt, as a client would see it. Meanwhile a stats request is sent every 10ms, whose latency shows whether answering requests is ever held up by the searches.
+
+    Args:
+        sessions (int): The number of sessions playing at once
+        seconds (double): How long to play for
+        budget (int): The milliseconds each engine move may take
+        workers (int): The number of engine worker processes; defaults to one per CPU
+        max_queue (int): The most move requests that may wait for a worker; defaults to the server's
+        connections (int): The most TCP connections the sessions are shared between
+
+    Returns:
+        dict: The moves answered per second, the 50th and 99th percentile move and stats latencies in milliseconds, the moves turned away as busy, and the server's own metrics
+    """
+    async def run():
+        server = GameServer(workers, max_queue)
+        await server.start()
+        listener = await asyncio.start_server(server.serve_connection, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        clients = [await GameClient.connect('127.0.0.1', port) for index in range(min(sessions, connections))]
+        latencies = []
+        control = []
+        counts = {'busy': 0, 'games': 0}
+        deadline = perf_counter() + seconds
+
+        async def request(client, op, **fields):
+            response = await client.request(op, **fields)
+            if not response['ok'] and response['error'] != 'busy':
+                raise RuntimeError(response['error'])
+            return response
+
+        async def player(index):
+            client = clients[index % len(clients)]
+            rng = random.Random(index)
+            while perf_counter() < deadline:
+                session = (await request(client, 'new', budget = budget))['session']
+                game = Connect4(7, 6)
+                while not game.game_over() and perf_counter() < deadline:
+                    col = rng.choice([col for col in range(game.COLS) if game.valid_move(col)])
+                    start = perf_counter()
+                    backoff = budget / 1000
+                    while not (response := await request(client, 'play', session = session, col = col))['ok']:
+                        counts['busy'] += 1
+                        await asyncio.sleep(rng.uniform(0, backoff))
+                        backoff = min(2 * backoff, 1.0)
+                    latencies.append(perf_counter() - start)
+                    game.make_move(col)
+                    if response['move'] is not None:
+                        game.make_move(response['move'])
+                counts['games'] += game.game_over()
+                await request(client, 'close', session = session)
+
+        async def prober():
+            while perf_counter() < deadline:
+                start = perf_counter()
+                await request(clients[0], 'stats')
+                control.append(perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        start = perf_counter()
+        await asyncio.gather(prober(), *(player(index) for index in range(sessions)))
+        elapsed = perf_counter() - start
+        metrics = await request(clients[0], 'stats')
+        for client in clients:
+            await client.close()
+        listener.close()
+        await listener.wait_closed()
+        await server.close()
+        return {
+            'moves_per_second': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'stats_p50_ms': percentile(control, 0.5) * 1000,
+            'stats_p99_ms': percentile(control, 0.99) * 1000,
+            'busy': counts['busy'],
+            'games': counts['games'],
+            'server': metrics,
+        }
+    return asyncio.run(run())
+
+
+def bench_memory(moves, depth):
+    """ Measures the memory a Minimax search allocates, with tracemalloc. The transposition table is created before measuring starts, as its arrays are allocated once at their full size. The search makes and unmakes moves on one game, so its peak should stay the same however many nodes it visits.
+
+    Args:
+        moves (array): The columns played to reach the position being searched
+        depth (int): The maximum depth of the search
+
+    Returns:
+        tuple: The number of nodes visited, the most memory in use at once during the search in bytes, and the memory still in use after it
+    """
+    game = setup(moves)
+    minimax = Minimax(game)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    minimax.minimax(0, depth, game.turn)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return minimax.nodes, peak - before, current - before
+
+
+def bench_ordering(moves, max_depth, killers, history):
+    """ Counts the nodes visited searching a position to each depth in turn, as iterative deepening does, so the killer moves and history of each depth carry over to the next.
+
+    Args:
+        moves (array): The columns played to reach the position being searched
+        max_depth (int): The deepest search
+        killers (boolean): Whether killer moves are used (see MoveOrdering)
+        history (boolean): Whether the history table is used
+
+    Returns:
+        array: The nodes visited by the search to each depth from 1 to max_depth
+    """
+    random.seed(0)
+    game = setup(moves)
+    minimax = Minimax(game, ordering = MoveOrdering(game.COLS, game.ROWS, killers, history))
+    nodes = []
+    for depth in range(1, max_depth + 1):
+        minimax.minimax(0, depth, game.turn)
+        nodes.append(minimax.nodes)
+    return nodes
+
+
+def bench_solver(positions):
+    """ Solves each of a list of positions with a new Solver, checking the score found against the known score.
+
+    Args:
+        positions (array): Pairs of the columns played (numbered from 1, as a string) and the exact score
+
+    Returns:
+        tuple: The mean time taken in seconds, the mean number of nodes visited, and whether every score was right
+    """
+    total_time = 0.0
+    total_nodes = 0
+    correct = True
+    for moves, expected in positions:
+        game = setup([int(move) - 1 for move in moves])
+        solver = Solver()
+        start = perf_counter()
+        score = solver.solve(game)
+        total_time += perf_counter() - start
+        total_nodes += solver.nodes
+        correct = correct and score == expected
+    return total_time / len(positions), total_nodes / len(positions), correct
+
+
+def profile(depth):
+    """ Prints the profile of a depth-limited search from each named position (see SearchStats): the nodes at each depth, how much alpha-beta pruning cut off, how often the transposition table hit, and the split of time between win checks and evaluation. The profiled search is also timed against an unprofiled one, to show what profiling costs.
+
+    Args:
+        depth (int): The maximum depth of the searches
+    """
+    print(f'{"position":<10}{"nodes":>9}{"branching":>11}{"cutoffs":>9}{"table hits":>12}{"win checks":>12}{"evaluation":>12}{"overhead":>10}  nodes per depth')
+    for name, moves in POSITIONS.items():
+        game = setup(moves)
+        minimax = Minimax(game)
+        minimax.minimax(0, depth, game.turn)
+        plain = minimax.stats
+        game = setup(moves)
+        minimax = Minimax(game, profile = True)
+        minimax.minimax(0, depth, game.turn)
+        stats = minimax.stats
+        print(f'{name:<10}{stats.nodes:>9}{stats.branching_factor():>11.2f}{stats.cutoff_rate():>9.1%}{stats.table_hit_rate():>12.1%}{stats.win_check_seconds:>11.3f}s{stats.evaluation_seconds:>11.3f}s{stats.seconds / plain.seconds:>9.1f}x  {stats.depth_nodes}')
+
+
+def best_rate(measure, seconds):
+    """ Runs a measurement over and over for a length of time and returns its best result, as noise on a busy machine only ever makes a run slower.
+
+    Args:
+        measure (function): Runs the measurement once, returning a throughput
+        seconds (double): How long to keep repeating it
+
+    Returns:
+        double: The highest throughput measured
+    """
+    best = 0.0
+    end = perf_counter() + seconds
+    while True:
+        best = max(best, measure())
+        if perf_counter() > end:
+            return best
+
+
+def time_search(moves, depth):
+    """ Times one Minimax search from a position. The random first guess at the best move is seeded, so the search visits the same nodes every time.
+
+    Args:
+        moves (array): The columns played to reach the position being searched
+        depth (int): The maximum depth of the search
+
+    Returns:
+        tuple: Searches per second, and the number of nodes visited
+    """
+    random.seed(depth)
+    game = setup(moves)
+    minimax = Minimax(game)
+    start = perf_counter()
+    minimax.minimax(0, depth, game.turn)
+    return 1 / (perf_counter() - start), minimax.nodes
+
+
+def regression_suite(seconds = 0.25):
+    """ Measures the throughput of the engine's hot paths on each named position: make_move and undo_move, checkwin and the incremental win check, valid_move, evaluation, and Minimax searches at each of REGRESSION_DEPTHS. Searches are measured in searches per second, so one that visits fewer nodes counts as faster.
+
+    Args:
+        seconds (double): How long to repeat each measurement for (see best_rate)
+
+    Returns:
+        dict: By measurement name, the throughput per second, and for searches the nodes visited.
+    """
+    results = {}
+    for name, moves in POSITIONS.items():
+        results[f'{name} make/undo'] = {'rate': best_rate(lambda: bench_moves(moves, 3)[1], seconds)}
+        results[f'{name} valid_move'] = {'rate': best_rate(lambda: bench_valid_move(moves, 2000), seconds)}
+        results[f'{name} evaluation'] = {'rate': best_rate(lambda: bench_evaluation(moves, 2), seconds)}
+        if moves:
+            results[f'{name} checkwin'] = {'rate': best_rate(lambda: bench_checkwin(moves, 2000)[0], seconds)}
+            results[f'{name} line_win'] = {'rate': best_rate(lambda: bench_checkwin(moves, 2000)[1], seconds)}
+        for depth in REGRESSION_DEPTHS:
+            rate = best_rate(lambda: time_search(moves, depth)[0], seconds)
+            results[f'{name} minimax depth {depth}'] = {'rate': rate, 'nodes': time_search(moves, depth)[1]}
+    return results
+
+
+def regression(args):
+    """ Runs the regression suite from the command line, e.g. python Benchmark.py regression --save. Compares each throughput with a baseline file and reports any that fell by more than the threshold, or records the results as the new baseline. Baselines are only comparable on the machine they were recorded on, and a machine busy with other work can look like a regression, so a failure is worth running again.
+
+    Args:
+        args (object): The parsed command line arguments: baseline, save, threshold and seconds
+
+    Returns:
+        int: The exit status: 1 if anything regressed or there is no baseline to compare with, otherwise 0
+    """
+    if not args.save and not os.path.exists(args.baseline):
+        print(f'no baseline at {args.baseline}; record one with --save')
+        return 1
+    results = regression_suite(args.seconds)
+    if args.save:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent = 1)
+        print(f'saved {len(results)} measurements to {args.baseline}')
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressed = 0
+    print(f'{"measurement":<28}{"baseline/sec":>14}{"now/sec":>14}{"change":>9}')
+    for name, result in results.items():
+        if name not in baseline:
+            print(f'{name:<28}{"":>14}{result["rate"]:>14.1f}{"":>9}  new')
+            continue
+        change = result['rate'] / baseline[name]['rate'] - 1
+        status = 'REGRESSED' if change < -args.threshold else 'ok'
+        regressed += status == 'REGRESSED'
+        if 'nodes' in result and result['nodes'] != baseline[name].get('nodes'):
+            status += f' (nodes {baseline[name].get("nodes")} -> {result["nodes"]})'
+        print(f'{name:<28}{baseline[name]["rate"]:>14.1f}{result["rate"]:>14.1f}{change:>9.1%}  {status}')
+    print(f'{regressed} of {len(results)} measurements regressed by more than {args.threshold:.0%}')
+    return 1 if regressed else 0
+
+
+def scaling(moves, depths, max_workers):
+    """ Prints the time and speedup of root-parallel searches for 1 to max_workers processes at each depth.
+
+    Args:
+        moves (array): The columns played to reach the position being searched
+        depths (array): The depths to search to
+        max_workers (int): The largest number of worker processes to try
+    """
+    print(f'{"depth":<7}{"workers":<9}{"seconds":>10}{"nodes":>10}{"speedup":>9}  same move')
+    for depth in depths:
+        base = None
+        for workers in range(1, max_workers + 1):
+            elapsed, nodes, same = bench_parallel(moves, depth, workers)
+            base = base or elapsed
+            print(f'{depth:<7}{workers:<9}{elapsed:>10.2f}{nodes:>10}{base / elapsed:>9.2f}  {same}')
+
+
+def parallel_report(args):
+    """ Prints how root-parallel searches of the early position scale with the number of processes.
+    """
+    scaling(POSITIONS['early'], range(6, 11), os.cpu_count())
+
+
+def ordering_report(args):
+    """ Prints the nodes searched at each depth of every position with the static move order, and with killer moves, the history table or both.
+    """
+    policies = {'history': (False, True), 'killers': (True, False), 'both': (True, True)}
+    totals = {}
+    for name, moves in POSITIONS.items():
+        print(f'{name:<10}{"static":>9}' + ''.join(f'{policy:>9}{"saved":>8}' for policy in policies))
+        static = bench_ordering(moves, 10, False, False)
+        results = {policy: bench_ordering(moves, 10, *options) for policy, options in policies.items()}
+        for depth in range(10):
+            print(f'{f"depth {depth + 1}":<10}{static[depth]:>9}' + ''.join(f'{nodes[depth]:>9}{1 - nodes[depth] / static[depth]:>8.1%}' for nodes in results.values()))
+        totals['static'] = totals.get('static', 0) + sum(static)
+        for policy, nodes in results.items():
+            totals[policy] = totals.get(policy, 0) + sum(nodes)
+    print('all depths and positions: ' + ', '.join(f'{policy} {totals[policy]} nodes ({1 - totals[policy] / totals["static"]:.1%} saved)' for policy in policies))
+
+
+def memory_report(args):
+    """ Prints the memory searches of the early position use at each depth.
+    """
+    print(f'{"depth":<7}{"nodes":>9}{"peak bytes":>12}{"retained":>10}')
+    for depth in range(4, 10):
+        nodes, peak, retained = bench_memory(POSITIONS['early'], depth)
+        print(f'{depth:<7}{nodes:>9}{peak:>12}{retained:>10}')
+
+
+def ponder_report(args):
+    """ Prints how often pondering guesses the opponent's move, and how much faster it replies when it does.
+    """
+    print(f'{"depth":<7}{"think time":>11}{"hit rate":>10}{"reply (ponder)":>16}{"reply (fresh)":>15}{"same move":>11}')
+    for depth, think_time in ((9, 0.25), (11, 0.1), (11, 1.0)):
+        results = bench_ponder(4, depth, think_time)
+        print(f'{depth:<7}{think_time:>10.2f}s{results["hit_rate"]:>10.1%}{results["pondered"] * 1000:>14.1f}ms{results["plain"] * 1000:>13.1f}ms{results["same"]:>11.1%}')
+
+
+def render_report(args):
+    """ Prints the time the GUI takes to draw each move, redrawing everything and drawing only the changed spaces.
+    """
+    full, incremental = bench_render(20)
+    print(f'per move: full redraw {full:.3f}ms, changed spaces only {incremental:.3f}ms ({full / incremental:.1f}x faster)')
+
+
+def startup_report(args):
+    """ Prints the time taken to import each entry point, and for a pool worker to return its first result.
+    """
+    for module in ('engine', 'Connect4', 'MinimaxAttempt', 'MCTS', 'Connect4GUI'):
+        print(f'import {module:<16}{bench_import(module):>8.1f}ms')
+    for method in ('fork', 'spawn'):
+        bare, search = bench_worker(method)
+        print(f'pool worker ({method}){"":<{5 - len(method)}}{search:>8.1f}ms to first result, {search - bare:.1f}ms more than a worker with no engine')
+
+
+def server_report(args):
+    """ Prints the game server's throughput and latency under a rising number of sessions.
+    """
+    budget = 20
+    print(f'{os.cpu_count()} workers, {budget}ms budget per move, 5s per row')
+    print(f'{"sessions":<10}{"moves/sec":>10}{"p50":>9}{"p99":>9}{"busy":>7}{"overruns":>10}{"search p99":>12}{"stats p99":>11}')
+    for sessions in (1, 10, 100, 1000):
+        results = bench_server(sessions, 5, budget)
+        server = results['server']
+        print(f'{sessions:<10}{results["moves_per_second"]:>10.1f}{results["p50_ms"]:>7.1f}ms{results["p99_ms"]:>7.1f}ms{results["busy"]:>7}{server["overruns"]:>10}{server["search_p99_ms"]:>10.1f}ms{results["stats_p99_ms"]:>9.1f}ms')
+
+
+def solver_report(args):
+    """ Prints the time and nodes the solver takes on each set of positions, and whether it solved them all correctly.
+    """
+    print(f'{"positions":<11}{"mean seconds":>14}{"mean nodes":>12}  all correct')
+    for name, positions in SOLVER_POSITIONS.items():
+        elapsed, nodes, correct = bench_solver(positions)
+        print(f'{name:<11}{elapsed:>14.3f}{nodes:>12.0f}  {correct}')
+
+
+def summary(args):
+    """ Prints the speed of moves and searches in every position, the transposition table's hit rates, an iterative deepening search, and evaluation and win checks.
+    """
+    print(f'{"position":<10}{"test":<22}{"nodes":>10}{"nodes/sec":>14}{"pruned":>10}')
+    for name, moves in POSITIONS.items():
+        nodes, rate = bench_moves(moves, 5)
+        print(f'{name:<10}{"make/undo depth 5":<22}{nodes:>10}{rate:>14.0f}')
+        for depth in (5, 7):
+            move, nodes, rate, pruned = bench_search(moves, depth)
+            print(f'{name:<10}{f"minimax depth {depth}":<22}{nodes:>10}{rate:>14.0f}{pruned:>10.1%}')
+        move, nodes, rate, pruned = bench_search(moves, 7, threats = True)
+        print(f'{name:<10}{"threats depth 7":<22}{nodes:>10}{rate:>14.0f}{pruned:>10.1%}')
+    for name in ('opening', 'early'):
+        game = setup(POSITIONS[name])
+        minimax = Minimax(game)
+        minimax.minimax(0, 7, game.turn)
+        stats = minimax.table.stats()
+        print(f'transposition table ({name}, depth 7): {stats["hits"]} hits, {stats["misses"]} misses, {stats["collisions"]} collisions, hit rate {stats["hit_rate"]:.1%} ({stats["mirror_hit_rate"]:.1%} from mirror images)')
+    minimax = Minimax(setup(POSITIONS['opening']))
+    minimax.iterative_deepening(500)
+    print('iterative deepening (opening, 500ms): ' + ', '.join(f'depth {i["depth"]} {i["nodes"]} nodes {i["time"]:.0f}ms' for i in minimax.iterations))
+    print(f'evaluation (one grid per call): {bench_evaluation(POSITIONS["early"], 4):.0f} leaves/sec')
+    full, incremental = bench_checkwin(POSITIONS['middle'])
+    print(f'checkwin (full scan): {full:.0f}/sec    line_win (last counter): {incremental:.0f}/sec')
+
+
+def main(argv = None):
+    """ Runs the benchmark named on the command line, e.g. python Benchmark.py ordering, or the summary of the engine's speed if none is named.
+
+    Args:
+        argv (array): The command line arguments; sys.argv is used if not given
+
+    Returns:
+        int: The exit status
+    """
+    parser = argparse.ArgumentParser(prog = 'Benchmark.py', description = 'Measures the performance of the Connect 4 engines.')
+    parser.set_defaults(report = summary)
+    commands = parser.add_subparsers(title = 'benchmarks', metavar = 'benchmark', help = 'the benchmark to run; without one, a summary of the engine\'s speed')
+    for name, report, description in (('parallel', parallel_report, 'how root-parallel searches scale with the number of processes'),
+                                      ('ordering', ordering_report, 'the nodes saved by killer moves and the history table'),
+                                      ('memory', memory_report, 'the memory searches use'),
+                                      ('mcts', lambda args: mcts_report(100, 40, os.cpu_count()), 'MCTS playouts, tree reuse and strength against Minimax'),
+                                      ('ponder', ponder_report, 'the reply time saved by pondering'),
+                                      ('render', render_report, 'the time the GUI takes to draw each move'),
+                                      ('startup', startup_report, 'import times and pool worker start up'),
+                                      ('server', server_report, 'the game server under load'),
+                                      ('profile', lambda args: profile(7), 'the profile of a Minimax search'),
+                                      ('solver', solver_report, 'the exact solver')):
+        commands.add_parser(name, help = description).set_defaults(report = report)
+    command = commands.add_parser('regression', help = 'checks for performance regressions against a baseline', description = 'Checks the engine for performance regressions against a baseline.')
+    command.add_argument('--baseline', default = BASELINE_PATH, help = 'the baseline file to compare with or save to')
+    command.add_argument('--save', action = 'store_true', help = 'record the results as the new baseline instead of comparing')
+    command.add_argument('--threshold', type = float, default = 0.1, help = 'the largest fall in throughput allowed, as a fraction (default 0.1)')
+    command.add_argument('--seconds', type = float, default = 0.25, help = 'how long to repeat each measurement, keeping the best run')
+    command.set_defaults(report = regression)
+    args = parser.parse_args(argv)
+    return args.report(args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
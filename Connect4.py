@@ -1,34 +1,66 @@
-from enum import Enum
+from enum import IntEnum
+import random
+import struct
 
-class Result(Enum):
-    """ An Enumerator referenced by the Connect4 class to differentiate between different 'states' of the game.
+class Result(IntEnum):
+    """ An Enumerator referenced by the Connect4 class to differentiate between different 'states' of the game. A win has the same number as the winning player. The game itself stores results as plain integers (see NO_RESULT and DRAW), which compare equal to these.
     """
     NONE = 0
     P1WIN = 1
     P2WIN = 2
     DRAW = 3
 
+NO_RESULT = 0   #Result.NONE and Result.DRAW as plain integers: looking up an enum member costs several times more than the comparison itself, and the search checks results at every node.
+DRAW = 3
+
 class Connect4:
     """ A playable game of Connect4 with functions allowing it to be played with validation checks to find valid inputs and outcomes to the game. It updates properties of the object to reflect the current state of the game.
+
+    Alongside the grid, the game is stored as bitboards: each column takes ROWS+1 bits (the extra bit is an always-empty 'sentinel' so lines can't wrap between columns), with bit col*(ROWS+1)+row set where a counter sits. This lets wins be found with a handful of shifts and ANDs instead of rescanning the grid.
+
+    The size of the grid and the number in a row needed to win (K) belong to each game, so games of different sizes can be played side by side. Everything that only depends on them is built once per (COLS, ROWS, K) and cached on the class.
     """
     P1 = 1
     P2 = 2
-    COLS = 0
-    ROWS = 0
+    LINES = {}  #Cached per (COLS, ROWS, K): for every cell, the mask and run steps of the four lines running through it.
+    ZOBRIST = {}    #Cached per (COLS, ROWS, K): a random 64-bit key for every player and cell, and the same keys mirrored left to right.
+    WINDOWS = {}    #Cached per (COLS, ROWS, K): every group of K spaces in a line, which of them each cell is in, and the resulting value of each cell.
+    MOVE_CHARS = '123456789abcdefghijklmnopqrstuvwxyz'  #The characters for each column in a move string, numbered from 1 as players count them.
+    HEADER = struct.Struct('<BBBB') #The start of a game's bytes (see to_bytes): COLS, ROWS, K and the first player.
 
-    def __init__(self, COLS, ROWS):
+    def __init__(self, COLS, ROWS, K = 4):
         """ Initialises the game object, creating a grid, a total occupied spaces per column, the current turn and the result of the game.
 
         Args:
             COLS (int): The number of columns desired in the grid
             ROWS (int): The number of rows desired in the grid
+            K (int): The number of counters in a row needed to win
         """
-        Connect4.COLS = COLS
-        Connect4.ROWS = ROWS
+        self.COLS = COLS
+        self.ROWS = ROWS
+        self.K = K
+        self.dimensions = (COLS, ROWS, K)
+        self.H1 = ROWS + 1  #Bits per column in the bitboards, including the sentinel.
+        self.shifts = (1, self.H1, self.H1 + 1, self.H1 - 1)    #Vertical, horizontal, diagonal up-right, diagonal down-right.
+        self.bottom = sum(1 << col*self.H1 for col in range(COLS))  #The lowest space of every column.
+        self.board_mask = self.bottom * ((1 << ROWS) - 1)   #Every space in the grid, leaving out the sentinels.
+        self.column_masks = [((1 << ROWS) - 1) << col*self.H1 for col in range(COLS)]
+        self.run_steps = self.create_run_steps()
+        self.lines = self.create_lines()
+        self.zobrist, self.mirror_zobrist, self.turn_key = self.create_zobrist()
+        self.windows, self.cell_windows, self.weights = self.create_windows()
         self.grid = self.create_grid()
         self.tot = self.create_tot()
+        self.bitboards = self.create_bitboards()
+        self.scores = [0, 0, 0]    #The total value (see create_windows) of each player's counters, indexed like the bitboards.
+        self.window_counts = None   #Only kept once track_windows has been called.
+        self.open_windows = None
+        self.moves = 0
+        self.history = []   #The columns played so far, in order.
+        self.hash = 0
+        self.mirror_hash = 0    #The hash of the grid mirrored left to right, kept alongside so the canonical form is free to find.
         self.turn = Connect4.P1
-        self.result = Result.NONE
+        self.result = NO_RESULT
 
     def create_grid(self):
         """ Returns a 2D array with ROWS number of rows and COLS number of columns, filled with zeroes, which represent empty spaces in the grid.
@@ -37,9 +69,9 @@ class Connect4:
             2D array: An array containing ROWS arrays, each filled with COLS zeroes.
         """
         grid = []
-        for i in range(Connect4.ROWS):  #Creating the blank 'rows'.
+        for i in range(self.ROWS):  #Creating the blank 'rows'.
             grid.append([])
-            for j in range(Connect4.COLS):  #Adding zeroes to each 'row'.
+            for j in range(self.COLS):  #Adding zeroes to each 'row'.
                 grid[i].append(0)
         return grid
 
@@ -58,10 +90,132 @@ class Connect4:
             array: An array containing COLS zeroes
         """
         tot = []
-        for i in range(Connect4.COLS):
+        for i in range(self.COLS):
             tot.append(0)
         return tot
 
+    def create_bitboards(self):
+        """ Returns the empty bitboards. Index 0 holds every occupied space, while indexes 1 and 2 hold the counters of P1 and P2, so a player can be used directly as the index.
+
+        Returns:
+            array: Three integer bitmasks, all zero
+        """
+        return [0, 0, 0]
+
+    def create_run_steps(self):
+        """ Returns, for each direction in shifts, the shifts that find K in a row along it. ANDing a bitboard with itself shifted by one space leaves the starts of every two in a row; doing the same with the result shifted by two leaves the starts of every four in a row, and so on, with a last, shorter step if K isn't a power of two. There are always at least two steps (a shift of 0 changes nothing), so up to four in a row takes exactly two.
+
+        Returns:
+            tuple: A tuple of shifts for each direction
+        """
+        multiples = []
+        length = 1
+        while length * 2 <= self.K:
+            multiples.append(length)
+            length *= 2
+        if length < self.K:
+            multiples.append(self.K - length)
+        multiples += [0] * (2 - len(multiples))
+        return tuple(tuple(multiple * shift for multiple in multiples) for shift in self.shifts)
+
+    def create_lines(self):
+        """ Returns, for every cell in the bitboard, the four lines of up to 2K-1 cells (K-1 either side) which pass through it, each with the run steps (see create_run_steps) along it: the first two, then any others. These only depend on the size of the grid, so they are built once and cached on the class.
+
+        Returns:
+            dict: Maps a cell's bit index to a tuple of (mask, first step, second step, other steps) tuples
+        """
+        if self.dimensions not in Connect4.LINES:
+            lines = {}
+            steps = ((0, 1), (1, 0), (1, 1), (1, -1))  #(Column, row) steps in the same order as self.shifts
+            for col in range(self.COLS):
+                for row in range(self.ROWS):
+                    cell_lines = []
+                    for run_steps, (dc, dr) in zip(self.run_steps, steps):
+                        mask = 0
+                        for t in range(1 - self.K, self.K):
+                            c = col + t*dc
+                            r = row + t*dr
+                            if 0 <= c < self.COLS and 0 <= r < self.ROWS:
+                                mask |= 1 << (c*self.H1 + r)
+                        cell_lines.append((mask, run_steps[0], run_steps[1], run_steps[2:]))
+                    lines[col*self.H1 + row] = tuple(cell_lines)
+            Connect4.LINES[self.dimensions] = lines
+        return Connect4.LINES[self.dimensions]
+
+    def create_zobrist(self):
+        """ Returns the Zobrist keys used to hash the grid: a random 64-bit number for every player and cell, indexed the same way as the bitboards, and one more for P2 being the player to move. The hash of a position is the keys of its counters (and the turn key, if needed) XORed together, so it can be updated with one XOR per change. The keys are seeded from the size of the grid (and K, unless it is 4), so every game of that size (in any process) hashes positions the same way, and games of different sizes don't share hashes. The mirrored keys give each cell the key of the cell opposite it, so XORing them in as counters are played gives the hash of the mirror image.
+
+        Returns:
+            tuple: Three arrays of keys, one per bitboard index (index 0 is unused), the same arrays with each cell given the key of its mirror image, and the key for P2's turn
+        """
+        if self.dimensions not in Connect4.ZOBRIST:
+            seed = f'zobrist {self.COLS}x{self.ROWS}' if self.K == 4 else f'zobrist {self.COLS}x{self.ROWS} connect {self.K}'
+            rng = random.Random(seed)
+            cells = self.COLS * self.H1
+            keys = [[0] * cells] + [[rng.getrandbits(64) for i in range(cells)] for player in (Connect4.P1, Connect4.P2)]
+            mirrored = [[player_keys[(self.COLS - 1 - cell // self.H1)*self.H1 + cell % self.H1] for cell in range(cells)] for player_keys in keys]
+            Connect4.ZOBRIST[self.dimensions] = (keys, mirrored, rng.getrandbits(64))
+        return Connect4.ZOBRIST[self.dimensions]
+
+    def create_windows(self):
+        """ Returns every window (group of K spaces in a line that could make K in a row) in the grid, the windows each cell is part of, and the value of each cell, which is the number of windows it is part of. These values are what Minimax scores positions with.
+
+        Returns:
+            tuple: An array of windows, each a tuple of bit indexes; an array giving the indexes of the windows through each bit index; and an array giving the value of each bit index
+        """
+        if self.dimensions not in Connect4.WINDOWS:
+            windows = []
+            cell_windows = [[] for i in range(self.COLS * self.H1)]
+            for col in range(self.COLS):
+                for row in range(self.ROWS):
+                    for dc, dr in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                        if 0 <= col + (self.K - 1)*dc < self.COLS and 0 <= row + (self.K - 1)*dr < self.ROWS:
+                            window = tuple((col + t*dc)*self.H1 + row + t*dr for t in range(self.K))
+                            for cell in window:
+                                cell_windows[cell].append(len(windows))
+                            windows.append(window)
+            weights = [len(indexes) for indexes in cell_windows]
+            Connect4.WINDOWS[self.dimensions] = (windows, [tuple(indexes) for indexes in cell_windows], weights)
+        return Connect4.WINDOWS[self.dimensions]
+
+    def track_windows(self):
+        """ Starts keeping count of how many of each player's counters are in every window, and so how many windows each player has one, two or three counters in with the rest empty. open_windows[player][n] holds the number of windows player has n counters in; a window with K-1 is a threat to win in its empty space. These are then updated by make_move and undo_move, touching only the windows through the counter played.
+        """
+        self.window_counts = [None, [0] * len(self.windows), [0] * len(self.windows)]
+        self.open_windows = [None, [0] * (self.K + 1), [0] * (self.K + 1)]
+        for player in (Connect4.P1, Connect4.P2):
+            board = self.bitboards[player]
+            for cell in range(len(self.cell_windows)):
+                if board >> cell & 1:
+                    self.update_windows(cell, player, 1)
+
+    def update_windows(self, cell, player, change):
+        """ Updates the window counts after a counter is added to or removed from cell.
+
+        Args:
+            cell (int): The bit index of the counter
+            player (int): The player who owns the counter
+            change (int): 1 if the counter was added, -1 if it was removed
+        """
+        opponent = Connect4.P2 if player == Connect4.P1 else Connect4.P1
+        counts = self.window_counts[player]
+        other_counts = self.window_counts[opponent]
+        mine = self.open_windows[player]
+        theirs = self.open_windows[opponent]
+        for window in self.cell_windows[cell]:
+            count = counts[window]
+            other = other_counts[window]
+            if other == 0:  #Still open for player.
+                if count:
+                    mine[count] -= 1
+                if count + change:
+                    mine[count + change] += 1
+            elif count == 0:    #Player's first counter here blocks the opponent's window.
+                theirs[other] -= 1
+            elif count + change == 0:   #Player's last counter here is gone, reopening the opponent's window.
+                theirs[other] += 1
+            counts[window] = count + change
+
     def valid_move(self, move):
         """ Returns False if the column specified by move is full or outside of the grid.
 
@@ -71,7 +225,7 @@ class Connect4:
         Returns:
             bool: Whether or not the move is valid
         """
-        if self.tot[move] == Connect4.ROWS or move > Connect4.COLS-1 or move < 0:
+        if move > self.COLS-1 or move < 0 or self.tot[move] == self.ROWS:  #Bounds first, so an out of range column can't index tot.
             return False
         return True
     
@@ -79,78 +233,391 @@ class Connect4:
         """ Changes the current turn
         """
         self.turn = Connect4.P2 if self.turn == Connect4.P1 else Connect4.P1
+        self.hash ^= self.turn_key  #The same counters with a different player to move are a different position.
+        self.mirror_hash ^= self.turn_key
 
     def checkwin(self):
-        """ Checks whether an outcome has been achieved. Checks if either all columns are full or if four adjacent spaces within the grid are not empty and are the same colour horizotally, vertically, or diagonally. 
+        """ Checks whether an outcome has been achieved by scanning the whole board. Checks if either all columns are full or if K adjacent spaces within the grid are the same colour horizotally, vertically, or diagonally. make_move only looks at the lines through the counter just played, so this is only needed when the grid has been changed some other way.
 
         Returns:
             boolean: Whether or not an outcome has been reached
         """
-        
-        for row in self.grid:  #Remember grid upside down!
-            for col in range(Connect4.COLS-3):  #Horizontal victories
-                if len(set(row[col:col+4])) == 1 and row[col] != 0:
-                    self.result = Result.P1WIN if self.turn == 1 else Result.P2WIN
-                    return True
-        for row in zip(*self.grid):  #Vertical victories
-            for col in range(3):
-                if len(set(row[col:col+4])) == 1 and row[col] != 0:
-                    self.result = Result.P1WIN if self.turn == 1 else Result.P2WIN
+        for player in (Connect4.P1, Connect4.P2):
+            board = self.bitboards[player]
+            for steps in self.run_steps:
+                runs = board
+                for step in steps:  #Narrows the bits down to the start of every K in a row.
+                    runs &= runs >> step
+                if runs:
+                    self.result = player    #The same number as Result.P1WIN or Result.P2WIN.
                     return True
-        for row in range(3,Connect4.ROWS):  #Diagonal victories - bottom left to top right
-            for col in range(0,4):  #Only possible to 'start' these victories from the bottom left square
-                if self.grid[row][col] == self.turn and self.grid[row][col] == self.grid[row-1][col+1] and self.grid[row-1][col+1] == self.grid[row-2][col+2] and self.grid[row-2][col+2] == self.grid[row-3][col+3]:
-                    self.result = Result.P1WIN if self.turn == 1 else Result.P2WIN
-                    return True
-        for row in range(3,Connect4.ROWS):  #Diagonal victories - bottom right to top left
-            for col in range(3, Connect4.COLS):   #Only possible to 'start' these victories from the bottom right square
-                if self.grid[row][col] == self.turn and self.grid[row][col] == self.grid[row-1][col-1] and self.grid[row-1][col-1] == self.grid[row-2][col-2] and self.grid[row-2][col-2] == self.grid[row-3][col-3]:
-                    self.result = Result.P1WIN if self.turn == 1 else Result.P2WIN
+        if self.moves == self.COLS * self.ROWS:
+            self.result = DRAW
+            return True
+        self.result = NO_RESULT
+        return False
+
+    def line_win(self, cell, board):
+        """ Returns True if the counter at cell completes K in a row on board. Only the four lines running through cell are checked, as any new line must include the counter just played.
+
+        Args:
+            cell (int): The bit index of the counter just played
+            board (int): The bitboard of the player who owns the counter
+
+        Returns:
+            boolean: Whether the counter at cell is part of K in a row
+        """
+        for line, first, second, others in self.lines[cell]:
+            runs = board & line
+            runs &= runs >> first
+            runs &= runs >> second
+            if runs:    #Up to four in a row, that's a win; any further steps only run when it's close.
+                for step in others:
+                    runs &= runs >> step
+                if runs:
                     return True
-        for i in range(Connect4.COLS):
-            if self.tot[i] != Connect4.ROWS:
-                self.result = Result.NONE
-                return False
-        self.result = Result.DRAW
-        return True
+        return False
+
+    def winning_spaces(self, player):
+        """ Returns every empty space where player would complete K in a row, whether it can be played in yet or not, found for the whole grid at once. A space wins if, in some direction, the player's counters running up to it on one side and away from it on the other number K-1 between them.
+
+        Args:
+            player (int): The player to find winning spaces for
+
+        Returns:
+            int: A bitboard of the winning spaces
+        """
+        board = self.bitboards[player]
+        if self.K == 4: #Unrolled for the usual game, which is searched far more than any other.
+            spaces = (board << 1) & (board << 2) & (board << 3)    #Vertical: only ever on top of three.
+            for shift in self.shifts[1:]:
+                pairs = (board << shift) & (board << 2*shift)
+                spaces |= pairs & ((board << 3*shift) | (board >> shift))
+                pairs = (board >> shift) & (board >> 2*shift)
+                spaces |= pairs & ((board << shift) | (board >> 3*shift))
+            return spaces & self.board_mask & ~self.bitboards[0]
+        need = self.K - 1
+        spaces = 0
+        for shift in self.shifts:
+            before = after = -1 #-1 has every bit set: no counters needed yet.
+            befores = [before]
+            afters = [after]
+            for j in range(1, need + 1):    #Spaces with j counters in a row just before them, and just after them.
+                before &= board << j*shift
+                after &= board >> j*shift
+                befores.append(before)
+                afters.append(after)
+            for j in range(need + 1):
+                spaces |= befores[j] & afters[need - j]
+        return spaces & self.board_mask & ~self.bitboards[0]
+
+    def playable_spaces(self):
+        """ Returns the lowest empty space of every column that isn't full.
+
+        Returns:
+            int: A bitboard of the spaces the player to move can play in
+        """
+        return (self.bitboards[0] + self.bottom) & self.board_mask
+
+    def analyse_threats(self):
+        """ Finds the moves that matter most for the player to move, from the winning spaces of both players: the moves that win straight away, and otherwise the moves that don't lose straight away. If the opponent has a winning space that can be played next move, it must be blocked, so it is the only such move, and with two there are none. A move directly beneath one of the opponent's winning spaces lets them play there, so is never safe either.
+
+        Returns:
+            tuple: Bitboards of the winning moves and, if there are none, the safe moves; each has at most one space per column
+        """
+        playable = self.playable_spaces()
+        wins = self.winning_spaces(self.turn) & playable
+        if wins:
+            return wins, 0
+        threats = self.winning_spaces(Connect4.P2 if self.turn == Connect4.P1 else Connect4.P1)
+        forced = playable & threats
+        if forced:
+            if forced & (forced - 1):   #Two threats can't both be blocked.
+                return 0, 0
+            playable = forced
+        return 0, playable & ~(threats >> 1)
+
+    def winning_move(self, move, player):
+        """ Returns True if player would win by playing in the column specified by move, without making the move. The column must not be full.
+
+        Args:
+            move (int): The column to test
+            player (int): The player who would make the move
+
+        Returns:
+            boolean: Whether the move wins the game for player
+        """
+        cell = move*self.H1 + self.tot[move]
+        return self.line_win(cell, self.bitboards[player] | 1 << cell)
 
     def make_move(self, move):
-        """ Updates an item at a row specified by the value in the index of a column of tot, and a column specified by a column to the current turn, before incrementing the value in the index of a column of tot by +1.
+        """ Updates an item at a row specified by the value in the index of a column of tot, and a column specified by a column to the current turn, before incrementing the value in the index of a column of tot by +1. The bitboards, hash, scores and any window counts are updated alongside, and the result is found from the lines through the new counter only.
 
         Args:
             move (int): A column in which a move is to be made on the grid
         """
-        self.grid[self.tot[move]][move] = self.turn
+        row = self.tot[move]
+        self.grid[row][move] = self.turn
         self.tot[move] += 1
-        self.checkwin() #The game will always be unplayable after the winning move is made; function will only end after grid has been checked.
+        cell = move*self.H1 + row
+        self.bitboards[self.turn] |= 1 << cell
+        self.bitboards[0] |= 1 << cell
+        self.hash ^= self.zobrist[self.turn][cell]
+        self.mirror_hash ^= self.mirror_zobrist[self.turn][cell]
+        self.scores[self.turn] += self.weights[cell]
+        if self.window_counts is not None:
+            self.update_windows(cell, self.turn, 1)
+        self.moves += 1
+        self.history.append(move)
+        if self.line_win(cell, self.bitboards[self.turn]):
+            self.result = self.turn #The same number as Result.P1WIN or Result.P2WIN.
+        elif self.moves == self.COLS * self.ROWS:
+            self.result = DRAW
+        else:
+            self.result = NO_RESULT
         self.change_turn()
 
     def undo_move(self, move):
-        """ Increments the value in the index of a column of tot by -1, before updating an item at a row specified by the value in the index of a column of tot, and a column specified by a column to the zero.
+        """ Increments the value in the index of a column of tot by -1, before updating an item at a row specified by the value in the index of a column of tot, and a column specified by a column to the zero. Moves are only ever made on unfinished games, so undoing one always returns the game to having no result.
 
         Args:
             move (int): A column in which a move is to be unmade on the grid
         """
         self.tot[move] -= 1
-        self.grid[self.tot[move]][move] = 0
-        self.checkwin() #The game can be updated from an unplayable state, allowing for an 'unmade' move to allow the Minimax to keep exploring depths.
+        row = self.tot[move]
+        player = self.grid[row][move]
+        self.grid[row][move] = 0
+        cell = move*self.H1 + row
+        self.bitboards[player] ^= 1 << cell
+        self.bitboards[0] ^= 1 << cell
+        self.hash ^= self.zobrist[player][cell]
+        self.mirror_hash ^= self.mirror_zobrist[player][cell]
+        self.scores[player] -= self.weights[cell]
+        if self.window_counts is not None:
+            self.update_windows(cell, player, -1)
+        self.moves -= 1
+        self.history.pop()
+        self.result = NO_RESULT #The game can be updated from an unplayable state, allowing for an 'unmade' move to allow the Minimax to keep exploring depths.
         self.change_turn()
 
+    @staticmethod
+    def from_moves(COLS, ROWS, moves, first = 1, K = 4):
+        """ Returns a new game in the position reached by playing a list of moves from an empty grid. A list of moves is much smaller than the game object, so this is how games are sent to other processes.
+
+        Args:
+            COLS (int): The number of columns in the grid
+            ROWS (int): The number of rows in the grid
+            moves (array): The columns played, in order
+            first (int): The player who moved first
+            K (int): The number of counters in a row needed to win
+
+        Returns:
+            object: A Connect4 object in the position reached
+        """
+        game = Connect4(COLS, ROWS, K)
+        if first != Connect4.P1:
+            game.change_turn()
+        for move in moves:
+            game.make_move(move)
+        return game
+
+    @staticmethod
+    def from_move_string(moves, COLS = 7, ROWS = 6, first = 1, K = 4):
+        """ Returns a new game in the position reached by the moves in a move string (see move_string), checking every move.
+
+        Args:
+            moves (string): The columns played, in order, one character each
+            COLS (int): The number of columns in the grid
+            ROWS (int): The number of rows in the grid
+            first (int): The player who moved first
+            K (int): The number of counters in a row needed to win
+
+        Returns:
+            object: A Connect4 object in the position reached
+
+        Raises:
+            ValueError: If a move is not a column of the grid, is in a full column, or comes after the game has ended
+        """
+        game = Connect4(COLS, ROWS, K)
+        if first != Connect4.P1:
+            game.change_turn()
+        for char in moves.lower():
+            move = Connect4.MOVE_CHARS.find(char)
+            if move < 0 or not game.valid_move(move) or game.game_over():
+                raise ValueError(f"'{moves}' is not a sequence of valid moves on a {COLS}x{ROWS} grid")
+            game.make_move(move)
+        return game
+
+    def move_string(self):
+        """ Returns the moves played so far as text, one character per move: the column numbered from 1, then from 'a' for columns beyond 9. This is the usual way Connect4 positions are written down, e.g. '4453'.
+
+        Returns:
+            string: The move string
+        """
+        return ''.join(Connect4.MOVE_CHARS[move] for move in self.history)
+
+    def to_bytes(self):
+        """ Returns the game as bytes: HEADER, then one byte per move played. This holds everything needed to rebuild the game exactly, including the order of the moves, in a few dozen bytes, much less than pickling the game.
+
+        Returns:
+            bytes: The encoded game
+        """
+        return Connect4.HEADER.pack(self.COLS, self.ROWS, self.K, self.first_player()) + bytes(self.history)
+
+    @staticmethod
+    def from_bytes(data):
+        """ Returns a new game rebuilt from the bytes made by to_bytes. The moves are read straight from the buffer, without copying it.
+
+        Args:
+            data (bytes): The encoded game; any buffer, such as a bytearray, memoryview or mmap, will do
+
+        Returns:
+            object: A Connect4 object in the same position, with the same history
+        """
+        view = memoryview(data)
+        COLS, ROWS, K, first = Connect4.HEADER.unpack_from(view)
+        return Connect4.from_moves(COLS, ROWS, view[Connect4.HEADER.size:], first, K)
+
+    def pack(self):
+        """ Returns the position as one integer of at most 64 bits: the bitboard of the player to move plus the bitboard of every occupied space, which sets a bit just above the top counter of each column, then a bit for P2 to move. Every position of a grid has a different packed form, but the order the moves were played in is lost.
+
+        Returns:
+            int: The packed position
+
+        Raises:
+            ValueError: If the grid is too large to pack into 64 bits
+        """
+        size = self.COLS * self.H1
+        if size >= 64:
+            raise ValueError(f'A {self.COLS}x{self.ROWS} grid is too large to pack into 64 bits')
+        return self.bitboards[self.turn] + self.bitboards[0] + self.bottom | (self.turn == Connect4.P2) << size
+
+    @staticmethod
+    def unpack(value, COLS = 7, ROWS = 6, K = 4):
+        """ Returns a new game in a position packed by pack. As the order of the moves isn't packed, an order that reaches the position with each player taking turns is found, and used as the game's history.
+
+        Args:
+            value (int): The packed position
+            COLS (int): The number of columns in the grid
+            ROWS (int): The number of rows in the grid
+            K (int): The number of counters in a row needed to win
+
+        Returns:
+            object: A Connect4 object in the position
+
+        Raises:
+            ValueError: If value isn't a position the players could reach by taking turns
+        """
+        H1 = ROWS + 1
+        turn = Connect4.P2 if value >> COLS*H1 & 1 else Connect4.P1
+        other = Connect4.P2 if turn == Connect4.P1 else Connect4.P1
+        columns = []    #The owner of each counter, bottom up, for each column.
+        for col in range(COLS):
+            bits = value >> col*H1 & ((1 << H1) - 1)
+            if bits == 0:
+                raise ValueError(f'{value} is not a packed {COLS}x{ROWS} position')
+            columns.append([turn if bits >> row & 1 else other for row in range(bits.bit_length() - 1)])
+        moves = sum(len(column) for column in columns)
+        first = turn if moves % 2 == 0 else other
+        order = []
+        heights = [0] * COLS
+        dead_ends = set()   #Heights of the columns from which the rest can't be played in turn.
+        def place(player):
+            if len(order) == moves:
+                return True
+            if tuple(heights) in dead_ends:
+                return False
+            for col in range(COLS):
+                if heights[col] < len(columns[col]) and columns[col][heights[col]] == player:
+                    heights[col] += 1
+                    order.append(col)
+                    if place(Connect4.P2 if player == Connect4.P1 else Connect4.P1):
+                        return True
+                    order.pop()
+                    heights[col] -= 1
+            dead_ends.add(tuple(heights))
+            return False
+        if not place(first):
+            raise ValueError(f'{value} is not a {COLS}x{ROWS} position the players could reach by taking turns')
+        game = Connect4.from_moves(COLS, ROWS, order, first, K)
+        game.checkwin() #The order found may not end with the winning move.
+        return game
+
+    def canonical(self):
+        """ Returns the hash of the position's canonical form, and whether that form is the position's mirror image. A position and its left-right mirror image are equally good for the same player, so positions are stored under whichever of the two has the smaller hash, and one search serves both. A move stored for the canonical form is turned back with mirror_move if it was mirrored.
+
+        Returns:
+            tuple: The canonical hash, and True if it is the hash of the mirror image
+        """
+        if self.mirror_hash < self.hash:
+            return self.mirror_hash, True
+        return self.hash, False
+
+    def canonical_grid(self):
+        """ Returns a copy of the grid in the orientation of the position's canonical form (see canonical).
+
+        Returns:
+            2D array: The grid, mirrored left to right if the canonical form is the mirror image
+        """
+        if self.mirror_hash < self.hash:
+            return [row[::-1] for row in self.grid]
+        return [row[:] for row in self.grid]
+
+    def mirror_move(self, move):
+        """ Returns the column opposite move, which is where move is played in the mirror image of the grid.
+
+        Args:
+            move (int): A column
+
+        Returns:
+            int: The mirrored column
+        """
+        return self.COLS - 1 - move
+
+    def first_player(self):
+        """ Returns the player who made the first move of the game, which isn't always P1 (simulations alternate).
+
+        Returns:
+            int: The player who moved first
+        """
+        if (self.turn == Connect4.P1) == (self.moves % 2 == 0):
+            return Connect4.P1
+        return Connect4.P2
+
+    def copy(self):
+        """ Returns a new game in the same position, made by replaying the moves played so far from the same first player.
+
+        Returns:
+            object: A Connect4 object with the same grid, turn and result
+        """
+        game = Connect4.from_moves(self.COLS, self.ROWS, self.history, self.first_player(), self.K)
+        if self.window_counts is not None:
+            game.track_windows()
+        return game
+
     def game_over(self):
         """ Returns True if an outcome has occurred.
 
         Returns:
             boolean: Whether the game has ended or not
         """
-        return self.result != Result.NONE
+        return self.result != NO_RESULT
     
     def grid_clear(self):
-        """ Creates a new grid and tot, before assigning them to the class properties grid and tot.
+        """ Creates a new grid, tot and bitboards, before assigning them to the class properties grid, tot and bitboards and resetting the hash.
         """
         self.grid = self.create_grid()
         self.tot = self.create_tot()
-        self.result = Result.NONE
+        self.bitboards = self.create_bitboards()
+        self.scores = [0, 0, 0]
+        self.moves = 0
+        self.history = []
+        self.hash = 0
+        self.mirror_hash = 0
+        self.result = NO_RESULT
         self.turn = Connect4.P1
+        if self.window_counts is not None:
+            self.track_windows()
 
     def __repr__(self):
         """ Represents the grid.
@@ -1,9 +1,16 @@
 import tkinter
 import random
-from tkinter import ttk, Tk, Canvas, Frame, Button, Text, Radiobutton, Entry, Label, StringVar, IntVar, OptionMenu
+from tkinter import ttk, Tk, Canvas, Frame, Button, Text, Radiobutton, Entry, Label, StringVar, IntVar, OptionMenu, Checkbutton
 from Connect4 import Connect4, Result
-from MinimaxAttempt import Minimax
-from log_config import logging
+from BackgroundSearch import BackgroundSearch
+from OpeningBook import OpeningBook
+from Ponder import Ponder
+from SearchCache import SearchCache
+from TranspositionTable import TranspositionTable
+from functools import partial
+from time import perf_counter
+import math
+import log_config
 
 
 class Piece():
@@ -12,6 +19,110 @@ class Piece():
     R = 30
 
 
+class BoardRenderer:
+    """ Draws a game on a canvas. The grid lines and an oval for every space are created once, with the ovals of empty spaces hidden; after that, each frame only recolours the spaces that changed since the last, found by comparing the game's grid with what was last drawn. Clearing the grid, undoing moves and starting a new game are all just changes to some spaces. The canvas is only rebuilt if the size of the grid changes.
+
+    The time spent drawing every frame is measured, so the cost of rendering can be compared with the searches around it.
+    """
+    COLOURS = ('red', 'yellow') #The colours of P1 and P2's counters.
+
+    def __init__(self, canvas, width, height):
+        """ Initialises a renderer for a canvas with nothing drawn on it yet.
+
+        Args:
+            canvas (object): The TkInter Canvas to draw on
+            width (int): The width of the canvas
+            height (int): The height of the canvas
+        """
+        self.canvas = canvas
+        self.width = width
+        self.height = height
+        self.size = None    #The columns and rows the canvas was built for.
+        self.ovals = None   #The canvas item of each space, indexed like the game's grid.
+        self.drawn = None   #The player drawn in each space, indexed likewise.
+        self.last_frame = -math.inf
+        self.reset_timing()
+
+    def build(self, game):
+        """ Clears the canvas and creates the grid lines and the ovals of every space for the size of a game's grid, all empty.
+
+        Args:
+            game (object): The Connect4 object to be drawn
+        """
+        canvas = self.canvas
+        canvas.delete('all')
+        col_width = self.width // game.COLS
+        row_height = self.height // game.ROWS
+        for i in range(0, self.width, col_width):
+            canvas.create_line(i, 0, i, self.height)
+        for i in range(0, self.height, row_height):
+            canvas.create_line(0, i, self.width, i)
+        self.ovals = []
+        for row in range(game.ROWS):
+            y = row_height*(game.ROWS - 1 - row) + row_height // 2  #Row 0 of the grid is the bottom row.
+            self.ovals.append([canvas.create_oval(col_width*col + col_width // 2 - Piece.R, y - Piece.R, col_width*col + col_width // 2 + Piece.R, y + Piece.R, state = 'hidden') for col in range(game.COLS)])
+        self.drawn = [[0] * game.COLS for row in range(game.ROWS)]
+        self.size = (game.COLS, game.ROWS)
+
+    def draw(self, game, min_interval = 0.0):
+        """ Brings the canvas up to date with a game, recolouring only the spaces that changed. A frame that comes sooner than min_interval after the last is skipped; as every frame draws whatever changed since the last, the next one catches up.
+
+        Args:
+            game (object): The Connect4 object to draw
+            min_interval (double): The fewest seconds allowed between frames, to cap the frame rate; 0 draws every frame
+
+        Returns:
+            boolean: Whether the frame was drawn
+        """
+        start = perf_counter()
+        if start - self.last_frame < min_interval:
+            self.skipped += 1
+            return False
+        if self.size != (game.COLS, game.ROWS):
+            self.build(game)
+        canvas = self.canvas
+        drawn = self.drawn
+        for row, cells in enumerate(game.grid):
+            drawn_row = drawn[row]
+            for col, player in enumerate(cells):
+                if player != drawn_row[col]:
+                    if player == 0:
+                        canvas.itemconfigure(self.ovals[row][col], state = 'hidden')
+                    else:
+                        canvas.itemconfigure(self.ovals[row][col], fill = BoardRenderer.COLOURS[player - 1], state = 'normal')
+                    drawn_row[col] = player
+                    self.cells_drawn += 1
+        self.last_frame = perf_counter()
+        self.seconds += self.last_frame - start
+        self.frames += 1
+        return True
+
+    def redraw(self, game):
+        """ Rebuilds the canvas from nothing and draws a game on it, as every frame did before only changes were drawn.
+
+        Args:
+            game (object): The Connect4 object to draw
+        """
+        self.size = None
+        self.draw(game)
+
+    def reset_timing(self):
+        """ Starts measuring the frames drawn afresh.
+        """
+        self.frames = 0
+        self.skipped = 0
+        self.cells_drawn = 0
+        self.seconds = 0.0
+
+    def mean_frame_time(self):
+        """ Returns the mean time taken to draw a frame.
+
+        Returns:
+            double: The mean seconds per frame drawn
+        """
+        return self.seconds / self.frames if self.frames else 0.0
+
+
 class App():
     """ Stores and represents the main window of the project as a TkInter root with class methods which allow it to be dynamic and interactive with the user. Uses a Connect4 object in order to display and play the game graphically.
     """
@@ -19,7 +130,8 @@ class App():
     WINDOW_HEIGHT = 600
     CANVAS_WIDTH = 500
     CANVAS_HEIGHT = 450
-    colour = ['red', 'yellow']
+    POLL_INTERVAL = 50  #Milliseconds between checks on a Minimax searching in the background.
+    SIMULATION_FRAME_TIME = 1 / 20  #The fewest seconds between frames drawn during a simulation, capping it at 20 frames per second; moves in between are drawn together with the next frame.
 
     def __init__(self, game, player):
         """ Initialises the Home Screen as a TkInter root with a known Mode, Player, and Max_Depth, each of which determine the type of game the Minimax will play.
@@ -30,12 +142,26 @@ class App():
         """
         self.player = player
         self.mode = True
+        self.book = OpeningBook.load()  #None unless a book has been generated with OpeningBook.py.
+        self.cache = SearchCache.load() #Results of earlier searches, kept between games and runs of the program.
+        self.search = None  #The BackgroundSearch currently finding a move, if any.
+        self.search_callback = None
+        self.search_settings = None #The depth, time limit, book and cache of the last search, for pondering with.
+        self.ponder = Ponder()  #Its transposition table is shared by every search in a game against the player, so pondering carries over.
+        self.simulation_tables = {} #A TranspositionTable for each side of a simulation, by player, so neither side's search reuses the other's deeper or shallower results.
+        self.session = 0    #Counts new games and simulations, so moves scheduled for an old one are ignored.
         self.root = Tk()
         self.max_depth = tkinter.IntVar()
         max_depth_options = [3, 4, 5, 6, 7]
         self.max_depth.set(max_depth_options[2])
+        self.time_limit = tkinter.StringVar()
+        time_limit_options = ['Off', 250, 500, 1000, 2000]
+        self.time_limit.set(time_limit_options[0])  #When set, the Minimax searches as deep as it can in this many milliseconds instead of to max_depth.
+        self.pondering = tkinter.BooleanVar()
+        self.pondering.set(True)    #Whether the Minimax thinks on the player's time in a game against them.
         self.p = tkinter.IntVar()
         self.rounds = tkinter.StringVar()   #By defining these as TkInter Variables, you can easily set them using buttons on separate screens. Use .get(), .set().
+        self.round_limit = 10   #The validated number of rounds in the current simulation, kept apart from the entry box's variable.
 
         self.root.title("Connect 4")
         self.root.frame = ttk.Frame(self.root, width=App.WINDOW_WIDTH)
@@ -48,6 +174,7 @@ class App():
         self.root.canvas = Canvas(self.root.frame, width=App.CANVAS_WIDTH, height=App.CANVAS_HEIGHT)
         self.root.canvas.grid(row=2, column=1)
         self.root.canvas.bind('<Button-1>', self.canvas_click)
+        self.board = BoardRenderer(self.root.canvas, App.CANVAS_WIDTH, App.CANVAS_HEIGHT)
         self.root.buttonholder = ttk.Frame(self.root, width=App.WINDOW_WIDTH)
         self.root.buttonholder.grid(row = 3, column = 0)
         self.root.button1 = Button(self.root.buttonholder, text = 'New Game', activebackground = 'yellow', bg = 'grey', command = self.player_select_screen, height = 1, justify = 'center', width = 8, padx = 30)
@@ -56,6 +183,12 @@ class App():
         self.root.dropdown.pack(side = "right")
         self.root.description = Label(self.root.buttonholder, text = 'Minimax Depth:')
         self.root.description.pack(side = "right", padx = (10,0))
+        self.root.time_dropdown = OptionMenu(self.root.buttonholder, self.time_limit, *time_limit_options)
+        self.root.time_dropdown.pack(side = "right")
+        self.root.time_description = Label(self.root.buttonholder, text = 'Time Limit (ms):')
+        self.root.time_description.pack(side = "right", padx = (10,0))
+        self.root.ponder_check = Checkbutton(self.root.buttonholder, text = 'Ponder', variable = self.pondering, command = self.ponder.stop)
+        self.root.ponder_check.pack(side = "right", padx = (10,0))
         self.root.button2 = Button(self.root.buttonholder, text = 'Simulation', activebackground = 'yellow', bg = 'grey', command = self.s_player_select_screen, height = 1, justify = 'center', width = 8, padx = 30)
         self.root.button2.pack(side = "right")
 
@@ -63,13 +196,16 @@ class App():
 
         self.draw()
         self.root.mainloop()    
+        self.cancel_search()
+        self.cache.close()  #Writes any results still held in memory.
 
-    def draw(self):
-        """ Clears the canvas in the centre of the window, before drawing the grid and current pieces on top of it.
+    def draw(self, min_interval = 0.0):
+        """ Brings the canvas in the centre of the window up to date with the game, recolouring only the spaces that changed (see BoardRenderer).
+
+        Args:
+            min_interval (double): The fewest seconds allowed since the last frame, or the frame is skipped; 0 always draws
         """
-        self.root.canvas.delete('all')
-        self.draw_grid()
-        self.draw_pieces()
+        self.board.draw(self.game, min_interval)
     
     def new_game(self, game):
         """ Creates a new game and sets it to the class property.
@@ -127,7 +263,7 @@ class App():
         return win_count_minimax, win_count_opponent    #Due to draws, this is a 'double' data type tuple.
     
     def canvas_click(self, event):
-        """ If the canvas is clicked on, this function checks whether it is an ongoing game, the player’s turn, and a game, rather than a simulation. If true, then the x-co-ordinates of the click are calculated to find which column the click took place in. If valid, a counter is played at the correct height in the column, otherwise ‘That column is full.’ is displayed in a text box and no move is made.
+        """ If the canvas is clicked on, this function checks whether it is an ongoing game, the player’s turn, and a game, rather than a simulation. If true, then the x-co-ordinates of the click are calculated to find which column the click took place in. If valid, a counter is played at the correct height in the column and the Minimax starts thinking in the background, otherwise ‘That column is full.’ is displayed in a text box and no move is made.
 
         Args:
             event (object): Stores attributes about a click that occured on a canvas on a canvas
@@ -145,12 +281,7 @@ class App():
                         self.root.text.delete('1.0', '100.0')
                         self.root.text.insert('1.0', 'Minimax thinking...')
                         self.root.text.tag_add("tag_name", "1.0", "end")
-                        self.root.update_idletasks()
-                        self.root.after(500, self.min_max_move(self.max_depth.get()))
-                        self.root.text.delete('1.0', '100.0')
-                        self.draw()
-                        if self.game.game_over():
-                            self.final_result()
+                        self.min_max_move(self.max_depth.get(), self.time_limit.get(), book = True, cache = True, then = self.min_max_moved)
                 else:
                     self.root.text.delete('1.0', '100.0')
                     self.root.text.insert('1.0', 'That column is full.')
@@ -158,74 +289,118 @@ class App():
 
     
     def simulation(self, win_count_minimax, win_count_opponent):
-        """ Decides which opponent the minimax algorithm is facing, before playing a game of them against one another, checking whether a win has been achieved every turn. If so, then final_result is called, and if not, the function is called recursively. If the maximum number of rounds has been played, the text box changes from the scores of each player, being prepended with ‘Final score:’.
+        """ Decides which opponent the minimax algorithm is facing, before starting the next move of a game between them. Searches run in the background, and once each move has been made simulation_moved checks whether a win has been achieved and calls this function again, through the Tk event loop, so the window keeps responding and long simulations can't reach the recursion limit. Once the maximum number of rounds has been played, the text box changes from the scores of each player, being prepended with ‘Final score:’. For large numbers of games without drawing them, use Tournament.py instead.
 
         Args:
             win_count_minimax (double): The current number of victories achieved by the Minimax function (draws are counted as half a win)
             win_count_opponent (double): The current number of victories achieved by the opponent function (draws are counted as half a win)
         """
+        self.win_count_minimax = win_count_minimax
+        self.win_count_opponent = win_count_opponent
         self.root.text.delete('1.0', '100.0')
         self.root.text.insert('1.0', f'Minimax: {win_count_minimax}    Opponent: {win_count_opponent}')
         self.root.text.tag_add("tag_name", "1.0", "end")
-        if win_count_minimax + win_count_opponent != self.rounds:
-            if self.player == 1:    #self.player remains SEPARATE from self.turn, therefore this can stay
-                self.delay(self.min_max_move(self.max_depth.get())) if self.game.turn == self.game.P1 else self.delay(self.random_move())
+        if win_count_minimax + win_count_opponent != self.round_limit:
+            moved = partial(self.simulation_moved, self.session)
+            if self.game.turn == self.game.P1:
+                self.min_max_move(self.max_depth.get(), self.time_limit.get(), book = True, cache = True, then = moved)
+            elif self.player == 1:  #self.player remains SEPARATE from self.turn, therefore this can stay
+                self.random_move()
+                self.delay(moved)
             else:
-                self.delay(self.min_max_move(self.max_depth.get())) if self.game.turn == self.game.P1 else self.delay(self.min_max_move(self.player+1))
-            if self.game.game_over():
-                win_count_minimax, win_count_opponent = self.s_final_result(win_count_minimax, win_count_opponent)
-            self.draw()
-            self.root.update_idletasks() 
-            
-            self.simulation(win_count_minimax, win_count_opponent)
+                self.min_max_move(self.player+1, then = moved)
         else:
             self.root.text.insert('1.0', 'Final Result: ')
             self.root.text.tag_add("tag_name", "1.0", "end")
-            self.rounds = tkinter.StringVar()   #Otherwise .get() and .set() do not work on a second simulation
+            self.draw() #Catches up on any skipped frames.
+            log_config.info(f'Simulation rendered {self.board.frames} frames ({self.board.skipped} skipped), {self.board.mean_frame_time() * 1000:.2f}ms per frame')
+
+    def simulation_moved(self, session):
+        """ Called once a move of a simulation has been made. Records the result if the game is over, redraws the grid and carries on the simulation.
+
+        Args:
+            session (int): The session the move belongs to; if a new game or simulation has started since, nothing happens
+        """
+        if session != self.session:
+            return
+        if self.game.game_over():
+            self.win_count_minimax, self.win_count_opponent = self.s_final_result(self.win_count_minimax, self.win_count_opponent)
+        self.draw(App.SIMULATION_FRAME_TIME)
+        self.simulation(self.win_count_minimax, self.win_count_opponent)
 
     def random_move(self):
         """ Makes a random, valid move.
         """
         if not self.game.game_over():
-            move = random.randint(0,6)
+            move = random.randint(0, self.game.COLS - 1)
             while self.game.valid_move(move) == False:
-                move = random.randint(0,6)
+                move = random.randint(0, self.game.COLS - 1)
             self.game.make_move(move)
 
-    def min_max_move(self, max_depth):
-        """ Creates a Minimax object and calls minimax on the current grid with a max depth, making a move in the column returned.
+    def min_max_move(self, max_depth, time_limit = 'Off', book = False, cache = False, then = None):
+        """ Starts a Minimax searching the current grid in the background with a max depth, replacing any search already running. This returns straight away; poll_search checks back until the search is done, then makes a move in the column found and calls then. If a time limit is given, the Minimax instead searches deeper and deeper until the time runs out. If the opening book is used and has the position, its move is made without searching, and likewise if the search cache is used and the position was already searched deep enough. If the position was already searched in full while pondering on the player's time, its move is made straight away. In a game against the player every search shares the ponder's transposition table; in a simulation each side has its own.
 
         Args:
             max_depth (int): The maximum 'depth' that the Minimax object can explore, or the maximum number of moves that can be made on the grid by the Minimax object
+            time_limit (string): The time allowed for the move in milliseconds, or 'Off' to search to max_depth
+            book (boolean): Whether to look the position up in the opening book first
+            cache (boolean): Whether to reuse and store results in the search cache
+            then (function): Called with no arguments once the move has been made
         """
         if not self.game.game_over():
-            minimax = Minimax(self.game)
-            minimax.minimax(0, max_depth, self.game.turn)
-            if self.game.valid_move(minimax.best_move):
-                self.game.make_move(minimax.best_move)
-            else:   
-                self.random_move()
-        
-    
-    def draw_grid(self):
-        """ Draws lines over the canvas at equal intervals to create a grid.
+            self.cancel_search()
+            time_limit = int(time_limit) if str(time_limit).isdigit() else None
+            self.search_settings = (max_depth, time_limit, self.book if book else None, self.cache if cache else None)
+            move = self.ponder.take(self.game, *self.search_settings)
+            if move is not None:
+                self.game.make_move(move)
+                if then is not None:
+                    then()
+                return
+            table = self.ponder.table if self.mode else self.simulation_tables[self.game.turn]
+            self.search = BackgroundSearch(self.game, *self.search_settings, table)
+            self.search_callback = then
+            self.root.after(App.POLL_INTERVAL, self.poll_search, self.search)
+
+    def poll_search(self, search):
+        """ Checks whether a background search has finished. If not, checks again after POLL_INTERVAL, leaving the event loop free in between; if so, makes its move (or a random move if it found no valid one) and calls the function given to min_max_move.
+
+        Args:
+            search (object): The BackgroundSearch being waited for; if it has since been cancelled or replaced, nothing happens
+        """
+        if search is not self.search:
+            return
+        if not search.done():
+            self.root.after(App.POLL_INTERVAL, self.poll_search, search)
+            return
+        self.search = None
+        move = search.result()
+        if move is None:
+            return
+        if self.game.valid_move(move):
+            self.game.make_move(move)
+        else:
+            self.random_move()
+        if self.search_callback is not None:
+            self.search_callback()
+
+    def cancel_search(self):
+        """ Cancels the background search, if there is one, and any pondering. Its move will not be made.
         """
-        for i in range(0, App.CANVAS_WIDTH, App.CANVAS_WIDTH // Connect4.COLS):
-            self.root.canvas.create_line(i, 0, i, App.CANVAS_HEIGHT)
-        for i in range(0, App.CANVAS_HEIGHT, App.CANVAS_HEIGHT // Connect4.ROWS):
-            self.root.canvas.create_line(0, i, App.CANVAS_WIDTH, i)
+        self.ponder.stop()
+        if self.search is not None:
+            self.search.cancel()
+            self.search = None
 
-    def draw_pieces(self):
-        """ Draws circles at each point in the grid where specified by the game object, the colour corresponding to each player.
+    def min_max_moved(self):
+        """ Called once the Minimax has moved in a game against the player. Redraws the grid and shows the result if the game is over, and otherwise starts pondering on the player's move if that is turned on.
         """
-        grid = self.game.return_grid()[::-1]
-        for row in range(len(grid)):
-            for col in range(len(grid[row])):
-                if grid[row][col] != 0:
-                    self.colour = App.colour[0] if grid[row][col] == Connect4.P1 else App.colour[1]
-                    COL_WIDTH = App.CANVAS_WIDTH // Connect4.COLS
-                    ROW_HEIGHT = App.CANVAS_HEIGHT // Connect4.ROWS
-                    self.circle((COL_WIDTH*col) + (COL_WIDTH // 2), (ROW_HEIGHT*row) + (ROW_HEIGHT // 2))
+        self.root.text.delete('1.0', '100.0')
+        self.draw()
+        if self.game.game_over():
+            self.final_result()
+        elif self.pondering.get():
+            self.ponder.start(self.game, *self.search_settings)
 
     def find_column(self, x):
         """ Calculates the column at which an x co-ordinate is within.
@@ -236,20 +411,7 @@ class App():
         Returns:
             double: The column in which the canvas was clicked
         """
-        return x // (App.CANVAS_WIDTH // Connect4.COLS)
-
-    def circle(self, x, y):
-        """ Draws a circle at an x and y co-ordinate, with radius r.
-
-        Args:
-            x (double): The x co-ordinate along the canvas at which a click occured
-            y (double): The y co-ordinate along the canvas at which a click occured
-        """
-        xl = x - Piece.R
-        yl = y - Piece.R
-        xr = x + Piece.R
-        yr = y + Piece.R
-        self.root.canvas.create_oval(xl, yl, xr, yr, fill=self.colour)
+        return x // (App.CANVAS_WIDTH // self.game.COLS)
 
     def return_to_game(self, mode):
         """ Updates whether the game is a simulation or active game, clears the grid, sets the player, and begins either a simulation, or a game, updating the text display to reflect this.
@@ -257,6 +419,8 @@ class App():
         Args:
             mode (boolean): False if the new game is a simulation, True otherwise
         """
+        self.cancel_search()    #Abandons whatever the Minimax was thinking about in the old game.
+        self.session += 1
         self.mode = mode
         self.game.grid_clear()
         self.draw()
@@ -267,14 +431,15 @@ class App():
             self.root.text.tag_configure("tag_name", justify='center')
             self.root.text.tag_add("tag_name", "1.0", "end")
             if self.player == self.game.P2:
-                self.root.after(1000, self.min_max_move(self.max_depth.get()))
-                self.draw()
+                self.min_max_move(self.max_depth.get(), self.time_limit.get(), book = True, cache = True, then = self.min_max_moved)
         else:
             self.game.turn = self.game.P1
-            self.rounds = int(self.rounds.get()) if self.rounds.get().isdigit() else 10     #Rounds validation
-            if self.rounds < 1 or self.rounds > 50:                                         #Also rounds validation
-                self.rounds = 10
-            self.root.after(2000, self.simulation(0,0))
+            self.round_limit = int(self.rounds.get()) if self.rounds.get().isdigit() else 10    #Rounds validation
+            self.board.reset_timing()
+            self.simulation_tables = {self.game.P1: TranspositionTable(), self.game.P2: TranspositionTable()}
+            if self.round_limit < 1 or self.round_limit > 50:                                   #Also rounds validation
+                self.round_limit = 10
+            self.simulation(0,0)
 
     def player_select_screen(self):
         """ When the ‘New Game’ button is pressed, a new window is created with a text display, two radiobuttons and an Enter button, where the player can select which player they want to be in the new game.
@@ -1,7 +1,8 @@
-import Connect4
-import Connect4GUI
-import MinimaxAttempt
-from log_config import logging
+import log_config
 
-app = Connect4GUI.App(Connect4.Connect4(7, 6), 1)
-#Creates an app object with the game already instantiated, with Player 1 as the default.
\ No newline at end of file
+if __name__ == '__main__':  #Worker processes started by spawn import this module too, so they must not import Tk or open the GUI.
+    import Connect4
+    import Connect4GUI
+    log_config.configure()
+    app = Connect4GUI.App(Connect4.Connect4(7, 6), 1)
+    #Creates an app object with the game already instantiated, with Player 1 as the default.
@@ -0,0 +1,139 @@
+from Connect4 import Connect4, Result
+import json
+
+
+class GameRecord:
+    """ The full record of one game: the size of the grid, who moved first, every move in order with the seconds taken to choose it, who played each colour and the result. Records are saved one per line of a JSONL file, with the moves as a move string (see Connect4.move_string), so a file of games can be read by eye and replayed exactly.
+    """
+
+    def __init__(self, cols = 7, rows = 6, k = 4, first = Connect4.P1, players = None):
+        """ Initialises the record of a game with no moves yet.
+
+        Args:
+            cols (int): The number of columns in the grid
+            rows (int): The number of rows in the grid
+            k (int): The number of counters in a row needed to win
+            first (int): The player who moves first
+            players (dict): The name of the player of each colour, by player number, or None
+        """
+        self.cols = cols
+        self.rows = rows
+        self.k = k
+        self.first = first
+        self.players = players if players is not None else {}
+        self.moves = []
+        self.times = [] #The seconds taken to choose each move.
+        self.result = Result.NONE
+
+    @staticmethod
+    def of(game, players = None):
+        """ Returns a record of the moves played so far in a game, without move times.
+
+        Args:
+            game (object): The Connect4 object to record
+            players (dict): The name of the player of each colour, by player number, or None
+
+        Returns:
+            object: The GameRecord
+        """
+        record = GameRecord(game.COLS, game.ROWS, game.K, game.first_player(), players)
+        for move in game.history:
+            record.add(move)
+        record.result = Result(game.result)
+        return record
+
+    def add(self, move, seconds = 0.0):
+        """ Records the next move.
+
+        Args:
+            move (int): The column played
+            seconds (double): The time taken to choose the move
+        """
+        self.moves.append(move)
+        self.times.append(seconds)
+
+    def game(self):
+        """ Returns a new game in the position at the end of the record.
+
+        Returns:
+            object: The Connect4 object
+        """
+        return Connect4.from_moves(self.cols, self.rows, self.moves, self.first, self.k)
+
+    def replay(self):
+        """ Replays the game move by move on a single Connect4 object, yielding it before the first move and after each one, for stepping through or checking a game.
+
+        Yields:
+            object: The Connect4 object in each position of the game in turn
+        """
+        game = Connect4(self.cols, self.rows, self.k)
+        if self.first != Connect4.P1:
+            game.change_turn()
+        yield game
+        for move in self.moves:
+            game.make_move(move)
+            yield game
+
+    def as_dict(self):
+        """ Returns the record as a dictionary that can be written as JSON.
+
+        Returns:
+            dict: The record
+        """
+        return {
+            'cols': self.cols,
+            'rows': self.rows,
+            'k': self.k,
+            'first': self.first,
+            'players': {str(player): name for player, name in self.players.items()},
+            'moves': ''.join(Connect4.MOVE_CHARS[move] for move in self.moves),
+            'times': self.times,
+            'result': Result(self.result).name,
+        }
+
+    @staticmethod
+    def from_dict(data):
+        """ Returns the record held in a dictionary made by as_dict, checking that its moves can be played.
+
+        Args:
+            data (dict): The record
+
+        Returns:
+            object: The GameRecord
+
+        Raises:
+            ValueError: If the moves can't be played, or there isn't one time per move
+        """
+        game = Connect4.from_move_string(data['moves'], data['cols'], data['rows'], data['first'], data['k'])
+        if len(data['times']) != len(game.history):
+            raise ValueError(f'{len(data["times"])} move times given for {len(game.history)} moves')
+        record = GameRecord(data['cols'], data['rows'], data['k'], data['first'], {int(player): name for player, name in data['players'].items()})
+        record.moves = list(game.history)
+        record.times = list(data['times'])
+        record.result = Result[data['result']]
+        return record
+
+    @staticmethod
+    def save(path, records):
+        """ Writes game records to a JSONL file, one per line.
+
+        Args:
+            path (string): The path of the file, which is overwritten
+            records (iterable): The GameRecords to write
+        """
+        with open(path, 'w') as file:
+            for record in records:
+                file.write(json.dumps(record.as_dict()) + '\n')
+
+    @staticmethod
+    def load(path):
+        """ Reads every game record from a JSONL file written by save, or by Tournament.run, whose lines hold a GameRecord along with the tally of the game.
+
+        Args:
+            path (string): The path of the file
+
+        Returns:
+            array: The GameRecords, in the order they were written
+        """
+        with open(path) as file:
+            return [GameRecord.from_dict(json.loads(line)) for line in file if line.strip()]
@@ -0,0 +1,591 @@
+from Connect4 import Connect4, Result
+from MCTS import MCTS
+from MinimaxAttempt import Minimax
+from TranspositionTable import TranspositionTable
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from time import perf_counter
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import signal
+import sys
+import log_config
+
+WORKER_TABLE = None #The TranspositionTable of a worker process, created by its first search and kept for every search after, whichever session it is for.
+
+
+def engine_move(state, engine, max_depth, time_limit):
+    """ Rebuilds a game from its bytes (see Connect4.to_bytes) and finds a move for the player to move within a time limit. It is outside the GameServer class so it can be sent to a worker process; only the few bytes of the game are sent, not the game or the session. A Minimax's invalid choice falls back to the move it would have searched first, like the move CLI.
+
+    Args:
+        state (bytes): The game to move in, as made by Connect4.to_bytes
+        engine (string): The engine to search with: minimax or mcts
+        max_depth (int): The deepest a Minimax's iterative deepening goes
+        time_limit (int): The time allowed in milliseconds
+
+    Returns:
+        tuple: The move, the depth reached and the seconds the search took in the worker
+    """
+    global WORKER_TABLE
+    game = Connect4.from_bytes(state)
+    start = perf_counter()
+    if engine == 'mcts':
+        mcts = MCTS(game)
+        move = mcts.search(time_limit = time_limit)
+        depth = mcts.stats.depth
+    else:
+        if WORKER_TABLE is None:    #Scores are kept from P1's point of view, so one table serves every session's positions.
+            WORKER_TABLE = TranspositionTable()
+        minimax = Minimax(game, WORKER_TABLE)
+        move = minimax.search(max_depth, time_limit)
+        if not game.valid_move(move):
+            move = minimax.order_moves()[0]
+        depth = len(minimax.iterations)
+    return move, depth, perf_counter() - start
+
+
+def percentile(samples, fraction):
+    """ Returns the nearest-rank percentile of some samples.
+
+    Args:
+        samples (iterable): The samples
+        fraction (double): The percentile as a fraction, e.g. 0.99
+
+    Returns:
+        double: The smallest sample at least that fraction of the samples are no greater than, or 0.0 if there are none
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(len(ordered) * fraction) - 1)]
+
+
+class ServerBusy(Exception):
+    """ Raised when a move request arrives while the engine queue is full, so it is turned away straight away rather than left to wait longer than any budget.
+    """
+
+
+class ServerMetrics:
+    """ The counts and timings of the requests a GameServer has handled. Timings are kept for the most recent SAMPLES engine moves only, so the percentiles follow the current load and memory stays bounded however long the server runs.
+    """
+    SAMPLES = 10000
+
+    def __init__(self):
+        """ Initialises the metrics with nothing counted.
+        """
+        self.requests = 0
+        self.errors = 0 #Requests answered with an error other than busy.
+        self.moves = 0  #Engine moves found.
+        self.rejected = 0   #Move requests turned away because the queue was full.
+        self.overruns = 0   #Engine moves that took longer than their budget, from arriving to being found.
+        self.queued = 0 #Move requests waiting for a worker now.
+        self.max_queued = 0
+        self.running = 0    #Move requests being searched by a worker now.
+        self.latency = deque(maxlen = ServerMetrics.SAMPLES)    #Seconds from a move request arriving to its move being found.
+        self.queue_wait = deque(maxlen = ServerMetrics.SAMPLES) #Seconds spent waiting for a worker.
+        self.search = deque(maxlen = ServerMetrics.SAMPLES) #Seconds spent searching in the worker.
+
+    def as_dict(self):
+        """ Returns the counts, and the 50th and 99th percentiles of each timing in milliseconds, as a dictionary that can be written as JSON.
+
+        Returns:
+            dict: The metrics
+        """
+        metrics = {
+            'requests': self.requests,
+            'errors': self.errors,
+            'moves': self.moves,
+            'rejected': self.rejected,
+            'overruns': self.overruns,
+            'queued': self.queued,
+            'max_queued': self.max_queued,
+            'running': self.running,
+        }
+        for name in ('latency', 'queue_wait', 'search'):
+            samples = getattr(self, name)
+            metrics[f'{name}_p50_ms'] = percentile(samples, 0.5) * 1000
+            metrics[f'{name}_p99_ms'] = percentile(samples, 0.99) * 1000
+        return metrics
+
+
+class Session:
+    """ One game hosted by a GameServer, with the engine settings its moves are found with. Its lock keeps one request at a time changing the game, so a move can't be played while the engine is still finding the reply to the last.
+    """
+
+    def __init__(self, session_id, game, engine, depth, budget):
+        """ Initialises a session around a new game.
+
+        Args:
+            session_id (int): The number clients refer to the session by
+            game (object): The Connect4 object of the session
+            engine (string): The engine the server replies with: minimax or mcts
+            depth (int): The deepest a Minimax searches
+            budget (int): The milliseconds each engine move may take by default, from the request arriving to the move being found
+        """
+        self.id = session_id
+        self.game = game
+        self.engine = engine
+        self.depth = depth
+        self.budget = budget
+        self.lock = asyncio.Lock()
+        self.last_used = perf_counter()
+
+
+class GameServer:
+    """ Hosts many games at once for clients connected over TCP, or over stdin and stdout, speaking a line protocol of one JSON object per line each way. Each game is a Session kept in memory, which is light enough that thousands can be open at once; the engine's moves are found by a bounded pool of worker processes, so the event loop that reads and answers requests never searches and is never held up by a search.
+
+    Every request is an object with an op, and may have an id, which is echoed in its response so requests can be pipelined on one connection and answered out of order. Columns are numbered from 0, and moves are also given as a move string (see Connect4.move_string). The ops are:
+        new: starts a session, with optional cols, rows, k, engine (minimax or mcts), depth (up to the number of spaces) and budget (milliseconds per engine move, up to MAX_BUDGET); returns its session number
+        play: plays col in a session and, unless reply is false, the engine's reply; an optional budget overrides the session's for this move
+        best: finds the engine's move in a session without playing it
+        state: returns a session's moves, result and player to move
+        close: ends a session
+        stats: returns the server's ServerMetrics and session count
+
+    Each engine move has a time budget, from its request arriving to the move being found. Requests wait in a queue for a free worker, and the search is given whatever budget is left once it starts, less SEARCH_MARGIN, but never less than MIN_SEARCH_TIME. When the queue already holds max_queue requests, new move requests are answered with a busy error at once (backpressure), so a client can back off rather than wait for a move that would come long after its budget.
+    """
+    DEFAULT_BUDGET = 100    #Milliseconds per engine move, when a session doesn't give its own.
+    DEFAULT_DEPTH = 8   #The deepest a Minimax searches, whatever its budget.
+    MAX_BUDGET = 10000  #The most milliseconds a client may give an engine move, so no session can hold a worker for long.
+    MAX_DEPTH = 127 #The deepest a session may ask for, beyond which a TranspositionTable can't store depths; no game lasts longer than its spaces either.
+    MAX_SIZE = 16   #The most columns or rows a session's grid may have, well inside what Connect4.to_bytes can pack, and small enough that setting up a game never holds up the event loop.
+    MIN_SEARCH_TIME = 5 #The fewest milliseconds a search is given, however long its request waited.
+    SEARCH_MARGIN = 3   #Milliseconds kept back from each search's budget for sending the game to the worker and the move back.
+    QUEUE_PER_WORKER = 16   #The default max_queue per worker: a queued search can be cut to MIN_SEARCH_TIME, so a worker works through this many in about DEFAULT_BUDGET.
+    WORKER_NICENESS = 10    #How much lower the workers' scheduling priority is than the server's, so answering requests never waits for the CPU behind a search when there are fewer CPUs than workers plus one.
+    ENGINES = ('minimax', 'mcts')
+
+    def __init__(self, workers = None, max_queue = None, max_sessions = 10000, idle_timeout = 600.0):
+        """ Initialises a server with no sessions and no worker processes yet.
+
+        Args:
+            workers (int): The number of engine worker processes; defaults to one per CPU
+            max_queue (int): The most move requests that may wait for a worker before new ones are turned away; defaults to QUEUE_PER_WORKER per worker
+            max_sessions (int): The most sessions that may be open at once
+            idle_timeout (double): The seconds a session may go unused before it is closed
+        """
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.max_queue = max_queue if max_queue is not None else GameServer.QUEUE_PER_WORKER * self.workers
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sessions = {}
+        self.ids = itertools.count(1)
+        self.metrics = ServerMetrics()
+        self.executor = None
+        self.slots = None   #A worker each: a request holds one while its search runs, so searches never queue inside the pool, where their wait couldn't be measured.
+        self.sweeper = None
+
+    async def start(self):
+        """ Starts the worker processes at a lower priority, waiting until each is ready so the first moves aren't slowed by starting them, and the task that closes idle sessions.
+        """
+        if hasattr(os, 'nice'):
+            self.executor = ProcessPoolExecutor(self.workers, initializer = os.nice, initargs = (GameServer.WORKER_NICENESS,))
+        else:   #Windows has no nice, so the workers keep the server's priority.
+            self.executor = ProcessPoolExecutor(self.workers)
+        self.slots = asyncio.Semaphore(self.workers)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, int) for worker in range(self.workers)))
+        self.sweeper = asyncio.create_task(self.sweep())
+
+    async def close(self):
+        """ Stops closing idle sessions and shuts the worker processes down, once any searches they are running finish.
+        """
+        if self.sweeper is not None:
+            self.sweeper.cancel()
+        if self.executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+
+    async def sweep(self):
+        """ Closes sessions that have gone unused for longer than idle_timeout, checking a few times per timeout, for as long as the server runs.
+        """
+        while True:
+            await asyncio.sleep(self.idle_timeout / 4)
+            cutoff = perf_counter() - self.idle_timeout
+            for session_id in [session_id for session_id, session in self.sessions.items() if session.last_used < cutoff and not session.lock.locked()]:
+                del self.sessions[session_id]
+
+    async def handle(self, request):
+        """ Answers one request. Errors, whether in the request or in the server, are answered rather than raised, so every request gets a response and one bad request never ends a connection.
+
+        Args:
+            request (dict): The request, as read from a line of JSON
+
+        Returns:
+            dict: The response, with ok true and the op's results, or ok false and an error
+        """
+        self.metrics.requests += 1
+        response = {'id': request.get('id')} if isinstance(request, dict) and 'id' in request else {}
+        try:
+            if not isinstance(request, dict):
+                raise ValueError('a request must be a JSON object')
+            op = request.get('op')
+            if op == 'new':
+                response.update(self.new_session(request))
+            elif op == 'play':
+                response.update(await self.play(self.session(request), request))
+            elif op == 'best':
+                session = self.session(request)
+                budget = GameServer.setting(request, 'budget', session.budget, GameServer.MAX_BUDGET)
+                async with session.lock:
+                    response['move'] = await self.find_move(session, budget)
+            elif op == 'state':
+                response.update(self.state(self.session(request)))
+            elif op == 'close':
+                self.sessions.pop(self.session(request).id, None)
+            elif op == 'stats':
+                response.update(self.metrics.as_dict())
+                response['sessions'] = len(self.sessions)
+            else:
+                raise ValueError(f"unknown op '{op}': expected new, play, best, state, close or stats")
+        except ServerBusy:
+            response.update({'ok': False, 'error': 'busy'})
+            return response
+        except (ValueError, TypeError, KeyError) as error:
+            self.metrics.errors += 1
+            response.update({'ok': False, 'error': str(error)})
+            return response
+        except Exception as error:  #A fault in the server or a worker, still answered, so the client isn't left waiting for a response that never comes.
+            self.metrics.errors += 1
+            log_config.info(f'Request {request!r} failed: {error!r}')
+            response.update({'ok': False, 'error': f'internal error: {type(error).__name__}'})
+            return response
+        response['ok'] = True
+        return response
+
+    def new_session(self, request):
+        """ Starts a session from a new request.
+
+        Args:
+            request (dict): The request, with optional cols, rows, k, engine, depth and budget
+
+        Returns:
+            dict: The session number and its state (see state)
+
+        Raises:
+            ValueError: If the server is full or a setting is invalid
+        """
+        if len(self.sessions) >= self.max_sessions:
+            raise ValueError(f'the server already has {self.max_sessions} sessions')
+        cols, rows, k = GameServer.setting(request, 'cols', 7), GameServer.setting(request, 'rows', 6), GameServer.setting(request, 'k', 4)
+        if not (1 <= cols <= GameServer.MAX_SIZE and 1 <= rows <= GameServer.MAX_SIZE and 1 <= k <= max(cols, rows)):
+            raise ValueError(f'a {cols}x{rows} grid with {k} in a row is not a game the server hosts: grids may be up to {GameServer.MAX_SIZE}x{GameServer.MAX_SIZE}')
+        engine = request.get('engine', 'minimax')
+        if engine not in GameServer.ENGINES:
+            raise ValueError(f"unknown engine '{engine}': expected minimax or mcts")
+        depth = GameServer.setting(request, 'depth', GameServer.DEFAULT_DEPTH, min(cols*rows, GameServer.MAX_DEPTH))
+        budget = GameServer.setting(request, 'budget', GameServer.DEFAULT_BUDGET, GameServer.MAX_BUDGET)
+        session = Session(next(self.ids), Connect4(cols, rows, k), engine, depth, budget)
+        self.sessions[session.id] = session
+        return {'session': session.id, **self.state(session)}
+
+    @staticmethod
+    def setting(request, name, default, maximum = None):
+        """ Returns a setting from a request, which must be a positive whole number, and no more than maximum.
+
+        Args:
+            request (dict): The request
+            name (string): The name of the setting
+            default (int): The value if the request doesn't give one
+            maximum (int): The largest value allowed, or None for no limit
+
+        Returns:
+            int: The setting
+
+        Raises:
+            ValueError: If the setting isn't a positive whole number or is over maximum
+        """
+        value = request.get(name, default)
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:    #JSON true and false arrive as bools, which Python counts as ints.
+            raise ValueError(f'{name} must be a positive whole number, not {value!r}')
+        if maximum is not None and value > maximum:
+            raise ValueError(f'{name} may be at most {maximum}, not {value}')
+        return value
+
+    def session(self, request):
+        """ Returns the session a request is for, marking it as used.
+
+        Args:
+            request (dict): The request, with its session number
+
+        Returns:
+            object: The Session
+
+        Raises:
+            ValueError: If there is no such session
+        """
+        session = self.sessions.get(request.get('session'))
+        if session is None:
+            raise ValueError(f"no session {request.get('session')}")
+        session.last_used = perf_counter()
+        return session
+
+    def state(self, session):
+        """ Returns the state of a session's game.
+
+        Args:
+            session (object): The Session
+
+        Returns:
+            dict: The move string, the result's name and the player to move
+        """
+        game = session.game
+        return {'moves': game.move_string(), 'result': Result(game.result).name, 'turn': game.turn}
+
+    async def play(self, session, request):
+        """ Plays a client's move in a session and, unless the request's reply is false, the engine's reply.
+
+        Args:
+            session (object): The Session
+            request (dict): The request, with the column to play, and optionally reply and budget
+
+        Returns:
+            dict: The engine's move (None if it didn't move) and the state of the game after it
+
+        Raises:
+            ValueError: If the game is over, the column can't be played or the budget isn't a positive whole number up to MAX_BUDGET
+            ServerBusy: If the engine queue is full; as when finding the reply fails in any way, the client's move is taken back, so it can be sent again
+        """
+        col = request.get('col')
+        budget = GameServer.setting(request, 'budget', session.budget, GameServer.MAX_BUDGET)
+        async with session.lock:
+            game = session.game
+            if game.game_over():
+                raise ValueError('the game is over')
+            if isinstance(col, bool) or not isinstance(col, int) or not game.valid_move(col):
+                raise ValueError(f'column {col} can\'t be played')
+            game.make_move(col)
+            move = None
+            if request.get('reply', True) and not game.game_over():
+                try:
+                    move = await self.find_move(session, budget)
+                except BaseException:  #Busy, a worker failing or the connection dropping mid-search: the client never sees a reply, so the board must not keep its move either.
+                    game.undo_move(col)
+                    raise
+                game.make_move(move)
+            return {'move': move, **self.state(session)}
+
+    async def find_move(self, session, budget):
+        """ Finds the engine's move in a session's game on a worker process, waiting in the queue for a free worker first. The event loop carries on answering other requests meanwhile. The session's lock must be held, so the game doesn't change while its bytes are being searched.
+
+        Args:
+            session (object): The Session
+            budget (int): The milliseconds the move may take, from now until it is found
+
+        Returns:
+            int: The move
+
+        Raises:
+            ValueError: If the game is over
+            ServerBusy: If max_queue requests are already waiting for a worker
+        """
+        if session.game.game_over():
+            raise ValueError('the game is over')
+        metrics = self.metrics
+        waiting = self.slots.locked()   #Every worker is busy, so the request joins the queue.
+        if waiting and metrics.queued >= self.max_queue:
+            metrics.rejected += 1
+            raise ServerBusy
+        arrived = perf_counter()
+        state = session.game.to_bytes()
+        metrics.queued += waiting
+        metrics.max_queued = max(metrics.max_queued, metrics.queued)
+        try:
+            await self.slots.acquire()
+        finally:
+            metrics.queued -= waiting
+        metrics.running += 1
+        try:
+            waited = perf_counter() - arrived
+            time_limit = max(GameServer.MIN_SEARCH_TIME, int(budget - waited * 1000) - GameServer.SEARCH_MARGIN)
+            search = partial(engine_move, state, session.engine, session.depth, time_limit)
+            move, depth, seconds = await asyncio.get_running_loop().run_in_executor(self.executor, search)
+        finally:
+            metrics.running -= 1
+            self.slots.release()
+        latency = perf_counter() - arrived
+        metrics.moves += 1
+        metrics.latency.append(latency)
+        metrics.queue_wait.append(waited)
+        metrics.search.append(seconds)
+        if latency * 1000 > budget:
+            metrics.overruns += 1
+        return move
+
+    async def respond(self, line, writer):
+        """ Answers one line read from a connection, writing the response as one line of JSON.
+
+        Args:
+            line (bytes): The line of the request
+            writer (object): The asyncio.StreamWriter of the connection
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            self.metrics.requests += 1
+            self.metrics.errors += 1
+            response = {'ok': False, 'error': 'a request must be one line of JSON'}
+        else:
+            response = await self.handle(request)
+        if writer.is_closing():
+            return
+        writer.write(json.dumps(response).encode() + b'\n')
+        try:
+            await writer.drain()
+        except ConnectionError: #The client has gone; the move is simply not delivered.
+            pass
+
+    async def serve_connection(self, reader, writer):
+        """ Reads requests from a connection until it closes, answering each in its own task, so a slow engine move never stops the requests behind it from being read and answered.
+
+        Args:
+            reader (object): The asyncio.StreamReader of the connection
+            writer (object): The asyncio.StreamWriter of the connection
+        """
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    task = asyncio.create_task(self.respond(line, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)   #Answers everything sent before the connection closed.
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve_tcp(self, host = '127.0.0.1', port = 8765):
+        """ Starts the server, and serves TCP connections until cancelled.
+
+        Args:
+            host (string): The address to listen on
+            port (int): The port to listen on, or 0 for any free port
+        """
+        await self.start()
+        try:
+            server = await asyncio.start_server(self.serve_connection, host, port, limit = 1 << 16)
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.close()
+
+    async def serve_stdio(self):
+        """ Starts the server, and serves requests from stdin, answering on stdout, until stdin closes. stdout must be a pipe or terminal.
+        """
+        await self.start()
+        try:
+            loop = asyncio.get_running_loop()
+            reader = asyncio.StreamReader(limit = 1 << 16)
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+            transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+            await self.serve_connection(reader, asyncio.StreamWriter(transport, protocol, reader, loop))
+        finally:
+            await self.close()
+
+
+class GameClient:
+    """ A client of a GameServer over TCP, which can have many requests in flight on its one connection at once: each is given an id, and its response is matched back to it whatever order responses arrive in.
+    """
+
+    def __init__(self, reader, writer):
+        """ Initialises a client on an open connection and starts reading its responses. Use GameClient.connect.
+
+        Args:
+            reader (object): The asyncio.StreamReader of the connection
+            writer (object): The asyncio.StreamWriter of the connection
+        """
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count(1)
+        self.waiting = {}   #The future of each request not yet answered, by id.
+        self.listener = asyncio.create_task(self.listen())
+
+    @staticmethod
+    async def connect(host = '127.0.0.1', port = 8765):
+        """ Connects to a server.
+
+        Args:
+            host (string): The server's address
+            port (int): The server's port
+
+        Returns:
+            object: The GameClient
+        """
+        reader, writer = await asyncio.open_connection(host, port, limit = 1 << 16)
+        return GameClient(reader, writer)
+
+    async def listen(self):
+        """ Reads responses until the connection closes, handing each to the request it answers.
+        """
+        try:
+            while line := await self.reader.readline():
+                response = json.loads(line)
+                future = self.waiting.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self.waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('the server closed the connection'))
+
+    async def request(self, op, **fields):
+        """ Sends a request and waits for its response.
+
+        Args:
+            op (string): The op, e.g. play
+            **fields: The rest of the request, e.g. session = 1, col = 3
+
+        Returns:
+            dict: The response
+        """
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request_id] = future
+        self.writer.write(json.dumps({'op': op, 'id': request_id, **fields}).encode() + b'\n')
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        """ Closes the connection.
+        """
+        self.writer.close()
+        await self.listener
+
+
+def main(argv = None):
+    """ Runs a server from the command line until interrupted, e.g. python GameServer.py --port 8765 --workers 4, or python GameServer.py --stdio
+
+    Args:
+        argv (array): The command line arguments; sys.argv is used if not given
+    """
+    parser = argparse.ArgumentParser(description = 'Hosts many Connect 4 games at once, speaking one JSON object per line.')
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 8765)
+    parser.add_argument('--stdio', action = 'store_true', help = 'serve requests from stdin, answering on stdout, instead of over TCP')
+    parser.add_argument('-w', '--workers', type = int, help = 'number of engine worker processes (default one per CPU)')
+    parser.add_argument('--max-queue', type = int, help = 'move requests that may wait for a worker before more are turned away as busy (default 16 per worker)')
+    parser.add_argument('--max-sessions', type = int, default = 10000)
+    parser.add_argument('--idle-timeout', type = float, default = 600.0, help = 'seconds before an unused session is closed (default 600)')
+    args = parser.parse_args(argv)
+    server = GameServer(args.workers, args.max_queue, args.max_sessions, args.idle_timeout)
+
+    async def serve():
+        try:    #Stops on SIGTERM as on Ctrl+C, so the worker processes are shut down rather than left behind.
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, AttributeError):   #Windows has neither.
+            pass
+        await (server.serve_stdio() if args.stdio else server.serve_tcp(args.host, args.port))
+    try:
+        asyncio.run(serve())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+from Connect4 import Connect4, NO_RESULT, DRAW
+from SearchStats import SearchStats
+from time import perf_counter
+from functools import partial
+import math
+import os
+import random
+import log_config
+
+
+def run_playouts(state, playouts, time_limit, exploration, seed):
+    """ Rebuilds a game from its bytes (see Connect4.to_bytes) and grows a new search tree from it. It is outside the MCTS class so it can be sent to a worker process by parallel_search; each worker grows its own tree, and only the statistics of the moves from the root are sent back.
+
+    Args:
+        state (bytes): The game to search from, as made by Connect4.to_bytes
+        playouts (int): The number of playouts to run, or None to run until time_limit
+        time_limit (int): The time allowed in milliseconds, or None to run playouts playouts
+        exploration (double): The exploration constant of the tree (see MCTS)
+        seed (int): The seed of the tree's random number generator, different for each worker so their playouts differ
+
+    Returns:
+        tuple: The visits and wins of each move from the root, as (move, visits, wins) tuples, the playouts run, the nodes added to the tree and the deepest of them
+    """
+    mcts = MCTS(Connect4.from_bytes(state), exploration, seed)
+    mcts.run(playouts, time_limit)
+    return [(child.move, child.visits, child.wins) for child in mcts.root.children], mcts.stats.playouts, mcts.stats.nodes, mcts.stats.depth
+
+
+class Node:
+    """ A position in the search tree of an MCTS, reached by playing move from its parent. It counts the playouts that passed through it and how many of them player, who made the move, went on to win, with draws counting as half a win.
+    """
+    __slots__ = ('move', 'parent', 'player', 'result', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, move, parent, player, result, untried):
+        """ Initialises a node no playouts have passed through yet.
+
+        Args:
+            move (int): The column played to reach the position, or None for the root
+            parent (object): The Node of the position before the move, or None for the root
+            player (int): The player who made the move
+            result (int): The result of the game at the position, as stored by Connect4
+            untried (array): The moves from the position not yet added to the tree, in the reverse of the order they will be tried; empty if the game is over
+        """
+        self.move = move
+        self.parent = parent
+        self.player = player
+        self.result = result
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+
+
+class MCTS:
+    """ Finds the best move on a Connect4 game by Monte Carlo Tree Search (UCT). Instead of searching every move to a fixed depth and scoring the positions at the bottom, it plays thousands of random games (playouts) from the position, growing a tree of the positions they start through, and steers more and more playouts towards the moves that have won the most while still trying the others now and then. The move played most often from the root is the best move.
+
+    Like a Minimax, it is made with a game and assigns the move it finds to best_move, and the measurements of each search to stats. The tree is kept between searches, so when the game has moved on by a few moves since the last search, the playouts already run through the new position are built on rather than thrown away.
+
+    Playouts don't play moves on the game, but on copies of its bitboards, checking only the lines through each new counter for a win (see run).
+    """
+    PLAYOUTS = 10000    #The playouts run by a search given neither a number of playouts nor a time limit.
+    EXPLORATION = math.sqrt(2)  #How strongly the tree favours moves it has tried less over moves that have won more; the square root of 2 is the usual value when playouts score from 0 to 1.
+
+    def __init__(self, game, exploration = EXPLORATION, seed = None):
+        """ Initialises the MCTS object with the current game, an empty tree, and assigns a random column as the best move.
+
+        Args:
+            game (object): The current game object
+            exploration (double): The exploration constant (see EXPLORATION)
+            seed (int): The seed of the random number generator used for playouts, or None to seed it from the system
+        """
+        self.game = game
+        self.exploration = exploration
+        self.random = random.Random(seed)
+        self.root = None    #The Node of the position last searched.
+        self.root_history = []  #The moves played to reach root, to tell whether the game has moved on from it.
+        self.best_move = random.randint(0, game.COLS - 1)
+        self.cancelled = False
+        self.added = 0  #Nodes added to the tree by the current search.
+        self.stats = None   #The SearchStats of the last search.
+        centre = (game.COLS - 1) / 2
+        self.centre_order = sorted(range(game.COLS), key = lambda col: abs(col - centre))   #Centre columns are tried first, as they tend to be the best moves.
+
+    def search(self, playouts = None, time_limit = None, book = None):
+        """ Finds the best move for the player to move, assigning it to best_move: from the opening book if it has the position, and otherwise by running playouts playouts, or as many as time_limit allows, building on the tree of the last search if the game has moved on from its position.
+
+        Args:
+            playouts (int): The number of playouts to run; with a time limit, the most to run
+            time_limit (int): The time allowed in milliseconds, or None to run playouts playouts
+            book (object): An OpeningBook to play from, or None
+
+        Returns:
+            int: The best move found
+        """
+        entry = book.lookup(self.game) if book is not None else None
+        if entry is not None:
+            self.best_move = entry[0]
+            self.stats = SearchStats('book', 0)
+            return self.best_move
+        self.run(playouts, time_limit)
+        best = max(self.root.children, key = lambda child: child.visits, default = None)
+        if best is not None:
+            self.best_move = best.move
+        log_config.info(f'MCTS ran {self.stats.playouts} playouts ({self.stats.reused_playouts} reused) in {self.stats.seconds * 1000:.0f}ms, best move {self.best_move}')
+        return self.best_move
+
+    def run(self, playouts = None, time_limit = None):
+        """ Runs playouts from the current position, growing the tree: each one follows the tree from the root to a position with a move not yet added (see select), adds the position after that move, plays random moves from there to the end of the game (see playout), and counts the result in every node it passed through. Moves are played on copies of the game's bitboards and column heights alone, not on the game, which would update its grid, hash and scores for nothing, so the game is left as it was.
+
+        Args:
+            playouts (int): The number of playouts to run; with a time limit, the most to run; with neither, PLAYOUTS
+            time_limit (int): The time allowed in milliseconds, or None to run playouts playouts
+        """
+        game = self.game
+        stats = SearchStats('mcts', 0)
+        start = perf_counter()
+        deadline = start + time_limit / 1000 if time_limit is not None else math.inf
+        if playouts is None:
+            playouts = MCTS.PLAYOUTS if time_limit is None else math.inf
+        self.cancelled = False  #A cancel only stops the search it interrupted, so the tree can still be built on by later ones.
+        self.reuse_tree()
+        self.added = 0
+        root = self.root
+        stats.reused_playouts = root.visits
+        count = 0
+        while count < playouts and not self.cancelled and (root.untried or root.children):   #A finished game has no moves to try.
+            boards = list(game.bitboards)
+            heights = list(game.tot)
+            node, depth = self.select(boards, heights)
+            winner = node.result if node.result != NO_RESULT else self.playout(boards, heights, 3 - node.player)
+            while node is not None:
+                node.visits += 1
+                if winner == node.player:
+                    node.wins += 1
+                elif winner == DRAW:
+                    node.wins += 0.5
+                node = node.parent
+            count += 1
+            if depth > stats.depth:
+                stats.depth = depth
+            if perf_counter() > deadline:
+                break
+        stats.playouts = count
+        stats.nodes = self.added
+        stats.seconds = perf_counter() - start
+        self.stats = stats
+
+    def reuse_tree(self):
+        """ Moves the root of the tree to the current position: down through the moves played since the last search if the game has moved on from its position and the tree reaches that far, otherwise to a new, empty tree. The rest of the old tree is let go.
+        """
+        game = self.game
+        root = self.root
+        played = len(self.root_history)
+        if root is not None and game.history[:played] == self.root_history:
+            for move in game.history[played:]:
+                root = next((child for child in root.children if child.move == move), None)
+                if root is None:
+                    break
+        else:
+            root = None
+        if root is None:
+            player = Connect4.P2 if game.turn == Connect4.P1 else Connect4.P1
+            root = Node(None, None, player, game.result, self.untried_moves(game.tot) if game.result == NO_RESULT else [])
+        root.parent = None
+        self.root = root
+        self.root_history = list(game.history)
+
+    def untried_moves(self, heights):
+        """ Returns the valid moves of a position, in the reverse of the order they should be added to the tree: from the centre outwards.
+
+        Args:
+            heights (array): The number of counters in each column
+
+        Returns:
+            array: The columns that aren't full, centre last
+        """
+        rows = self.game.ROWS
+        return [col for col in reversed(self.centre_order) if heights[col] != rows]
+
+    def select(self, boards, heights):
+        """ Follows the tree from the root to the first position with a move not yet added to the tree, and adds the position after that move, playing each move on boards and heights. At each position in the tree, the move with the highest upper confidence bound (UCT) is followed: the share of its playouts won, plus a bonus that grows slowly with the playouts through the position and shrinks with those through the move, so every move is tried again now and then. A position where the game is over has no moves to add, and is returned as it is.
+
+        Args:
+            boards (array): A copy of the game's bitboards, updated for the moves followed (apart from the occupied spaces at index 0)
+            heights (array): A copy of the number of counters in each column, updated likewise
+
+        Returns:
+            tuple: The Node added, or the finished position reached, and the number of moves followed to reach it
+        """
+        node = self.root
+        exploration = self.exploration
+        H1 = self.game.H1
+        depth = 0
+        while not node.untried and node.children:
+            bonus = exploration * math.sqrt(math.log(node.visits))
+            best = None
+            best_bound = -1.0
+            for child in node.children:
+                bound = child.wins / child.visits + bonus / math.sqrt(child.visits)
+                if bound > best_bound:
+                    best = child
+                    best_bound = bound
+            node = best
+            move = node.move
+            boards[node.player] |= 1 << move*H1 + heights[move]
+            heights[move] += 1
+            depth += 1
+        if node.untried:
+            move = node.untried.pop()
+            player = 3 - node.player    #P1 and P2 are 1 and 2.
+            cell = move*H1 + heights[move]
+            boards[player] |= 1 << cell
+            heights[move] += 1
+            depth += 1
+            if self.game.line_win(cell, boards[player]):
+                child = Node(move, node, player, player, [])
+            elif self.game.moves + depth == self.game.COLS * self.game.ROWS:
+                child = Node(move, node, player, DRAW, [])
+            else:
+                child = Node(move, node, player, NO_RESULT, self.untried_moves(heights))
+            node.children.append(child)
+            self.added += 1
+            node = child
+        return node, depth
+
+    def playout(self, boards, heights, player):
+        """ Plays random moves to the end of the game from the position reached by select, only checking the lines through each new counter for a win.
+
+        Args:
+            boards (array): The bitboards of the position, which are changed
+            heights (array): The number of counters in each column of the position
+            player (int): The player to move
+
+        Returns:
+            int: The winning player, or DRAW
+        """
+        rows = self.game.ROWS
+        H1 = self.game.H1
+        next_cells = [col*H1 + height for col, height in enumerate(heights)]
+        open_cols = [col for col, height in enumerate(heights) if height != rows]
+        line_win = self.game.line_win
+        rand = self.random.random
+        while open_cols:
+            i = int(rand() * len(open_cols))
+            col = open_cols[i]
+            cell = next_cells[col]
+            board = boards[player] | 1 << cell
+            if line_win(cell, board):
+                return player
+            boards[player] = board
+            if cell + 1 == col*H1 + rows:   #The column is now full.
+                open_cols[i] = open_cols[-1]
+                open_cols.pop()
+            else:
+                next_cells[col] = cell + 1
+            player = 3 - player
+        return DRAW
+
+    def parallel_search(self, playouts = None, time_limit = None, executor = None, workers = None):
+        """ Finds the best move like search, but with a separate tree grown in each of a number of processes (root parallelisation), assigning the move with the most playouts across every tree to best_move. The trees share nothing, so there is no locking, but they repeat much of each other's work near the root; in return, the playouts run in the same time grow with the number of processes. The tree kept for the next search is let go, as the workers' trees stay in their processes.
+
+        Args:
+            playouts (int): The number of playouts for each process to run; with a time limit, the most to run
+            time_limit (int): The time allowed in milliseconds, or None to run playouts playouts
+            executor (object): A ProcessPoolExecutor to run the trees on; if not given, one is created for this search
+            workers (int): The number of trees to grow; defaults to one per CPU
+
+        Returns:
+            int: The best move found
+        """
+        if workers is None:
+            workers = os.cpu_count()
+        start = perf_counter()
+        grow = partial(run_playouts, self.game.to_bytes(), playouts, time_limit, self.exploration)
+        seeds = [self.random.getrandbits(32) for worker in range(workers)]
+        if executor is None:
+            from concurrent.futures import ProcessPoolExecutor  #Imported only when needed, as it pulls in multiprocessing, which takes longer to import than the whole engine.
+            with ProcessPoolExecutor(workers) as pool:
+                results = list(pool.map(grow, seeds))
+        else:
+            results = list(executor.map(grow, seeds))
+        stats = SearchStats('mcts', 0)
+        visits = {}
+        for moves, count, nodes, depth in results:
+            stats.playouts += count
+            stats.nodes += nodes
+            stats.depth = max(stats.depth, depth)
+            for move, move_visits, wins in moves:
+                visits[move] = visits.get(move, 0) + move_visits
+        if visits:
+            self.best_move = max(sorted(visits), key = lambda move: visits[move])
+        stats.seconds = perf_counter() - start
+        self.stats = stats
+        self.root = None
+        self.root_history = []
+        log_config.info(f'Parallel MCTS ran {stats.playouts} playouts in {workers} trees in {stats.seconds * 1000:.0f}ms, best move {self.best_move}')
+        return self.best_move
+
+    def cancel(self):
+        """ Stops a search running on another thread after its current playout. The next search starts afresh, building on the tree as usual.
+        """
+        self.cancelled = True
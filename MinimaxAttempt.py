@@ -1,74 +1,487 @@
-from Connect4 import Connect4, Result
-from time import time
+from Connect4 import Connect4, DRAW
+from TranspositionTable import TranspositionTable
+from SearchStats import SearchStats, SearchProfiler
+from MoveOrdering import MoveOrdering
+from time import time, perf_counter
+from contextlib import contextmanager
+from functools import partial
 import math
 import random
-from log_config import logging
+import log_config
+
+class SearchTimeout(Exception):
+    """ Raised inside a search when its time limit has passed or it has been cancelled, unwinding the search so the best move of the last completed depth can be used.
+    """
+
+def search_root_move(state, max_depth, maximising_player, threats, move):
+    """ Rebuilds a game from its bytes (see Connect4.to_bytes), plays move, and searches the result as the Minimax would search it below the root. It is outside the Minimax class so it can be sent to a worker process by parallel_search; only the few bytes of the game are sent, not the game itself.
+
+    Args:
+        state (bytes): The game to search from, as made by Connect4.to_bytes
+        max_depth (int): The maximum 'depth' of the whole search, counting move as depth 1
+        maximising_player (int): The player whose point of view the Minimax is operating from
+        threats (boolean): Whether open twos and threes are also scored
+        move (int): The root move to search
+
+    Returns:
+        tuple: The move, its exact score, and the number of nodes visited
+    """
+    game = Connect4.from_bytes(state)
+    game.make_move(move)
+    minimax = Minimax(game, threats = threats)
+    score = minimax.minimax(1, max_depth, maximising_player)
+    return move, score, minimax.nodes
 
 class Minimax:
     """ Stores the best move, initially a random move, to be made on a Connect4 game. Has class methods allowing it to calculate the best move via evaluating the grid in terms of positive and negative score.
     """
+    CHECK_INTERVAL = 64 #Nodes searched between checks of the clock during a timed search.
+    WEIGHTS = {}    #Cached per (COLS, ROWS, K): the value of a counter in each space (the number of K in a rows it could be part of, see Connect4.create_windows), flattened the same way as the grid. For 7x6 these run from 3 in the corners to 13 in the centre.
+    THREAT_WEIGHTS = (4, 1) #Extra score per open window a player is one or two counters short of filling, when threats are being counted.
+    LOG_STATS = False   #Whether the SearchStats of every search are written to the log as a line of JSON.
 
-    def __init__(self, game):
+    def __init__(self, game, table = None, threats = False, profile = False, ordering = None):
         """ Initialises the Minimax object with the current game and assigns a random column as the best move.
 
         Args:
             game (object): The current game object 
+            table (object): A TranspositionTable to share with other searches; a new one is created if not given
+            threats (boolean): Whether positions are also scored by their open twos and threes (see threat_score), which has the game track its windows
+            profile (boolean): Whether searches also record the detailed measurements of a SearchProfiler, which slows them down
+            ordering (object): A MoveOrdering whose killer moves and history adjust the order moves are searched in, which can be shared with later searches of the same game; if not given, a new one using neither leaves the static order
         """
         self.game = game
-        self.best_move = random.randint(0,6)
+        self.table = table if table is not None else TranspositionTable()
+        self.ordering = ordering if ordering is not None else MoveOrdering(game.COLS, game.ROWS)
+        self.threats = threats
+        if threats and game.window_counts is None:
+            game.track_windows()
+        self.best_move = random.randint(0, game.COLS - 1)
+        self.previous_best = None   #The best move found by the last completed search, tried first by the next one.
+        self.nodes = 0
+        self.next_check = math.inf  #The node count at which a timed search next checks the clock.
+        self.deadline = math.inf
+        self.cancelled = False
+        self.iterations = []
+        self.profile = profile
+        self.stats = None   #The SearchStats of the last search.
+        self.measuring = False
+        self.weights = self.create_weights()
+        centre = (game.COLS - 1) / 2
+        self.centre_order = sorted(range(game.COLS), key = lambda col: abs(col - centre))   #Centre columns take part in the most lines, so tend to be the best moves.
 
-    def minimax(self, depth, max_depth, maximising_player):
+    def minimax(self, depth, max_depth, maximising_player, alpha = -math.inf, beta = math.inf):
         """ Returns a positive infinity, negative infinity, or 0 value depending on whether the game has reached a result, or the heuristic score of the game state if the maximum depth has been reached. Otherwise, it calculates all possible moves on the game state and makes them until these conditions have been met. Once they have, the movements are evaluated, either by comparing game state to a table of values as to create a heuristic 'score' for each move, negative for the opponent, positive for the plauer, or by a very high, very low, or average score for a win, loss and draw respectively. These scores for each move are compared to find the highest score-available move, which is then assigned to a class variable. 
 
+        Alpha-beta pruning stops exploring a position as soon as it is shown to be no better than one already available higher up the tree, and moves are ordered (see order_moves) so this happens as early as possible. The move chosen is the same as a full search would choose. The number of positions visited is stored in nodes.
+
+        Positions already in the transposition table, searched at least as deep, are not searched again; otherwise the stored best move is tried first. The table is keyed on the canonical form of each position, so a position's mirror image counts as the same position, with its stored move mirrored back.
+
+        With at least two moves left to search, the threats in the position are found first (see Connect4.analyse_threats). A position where the player to move can win straight away, or can't stop the opponent winning, is scored without searching; otherwise only the moves that don't hand the opponent a win are searched, as the rest are sure to score as losses.
+
         Args:
             depth (int): The current 'depth' the Minimax is operating at, or how many turns have been taken total by the Minimax
             max_depth (int): The maximum 'depth' at which the Minimax is allowed to explore, or how many turns the Minimax is able to take
             maximising_player (int): The player whose point of view the Minimax is operating from
+            alpha (double): The score the maximising player is already guaranteed elsewhere in the tree
+            beta (double): The score the minimising player is already guaranteed elsewhere in the tree
 
         Returns:
             int: Either a 0, 500, or -500 if an outcome has occured, respective of the outcome. Otherwise, an integer calculated by the evaluation function when given the grid. Once all nodes have been explored, however, the highest score achieved by either method is returned
         """
+        if depth == 0:
+            return self.search_root(max_depth, maximising_player)
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.check_time()
+
         if self.game.game_over():   #Outcome
-            if self.game.result != Result.DRAW:
-                res = 1 if self.game.result == Result.P1WIN else 2
-                return 500 if res == maximising_player else -500
+            if self.game.result != DRAW:
+                return 500 if self.game.result == maximising_player else -500   #A win is numbered after the winner.
             else:
                 return 0
 
         elif depth == max_depth:    #Max depth
-            return self.evaluation(self.game.grid, maximising_player)
+            opponent = Connect4.P2 if maximising_player == Connect4.P1 else Connect4.P1
+            score = self.game.scores[maximising_player] - self.game.scores[opponent]    #Kept up to date by the game, so the same as evaluation(self.game.grid, maximising_player).
+            if self.threats:
+                score += self.threat_score(maximising_player)
+            return score
+
+        elif depth == max_depth - 1 and not self.threats:   #Every move from here reaches max depth, so the best is found from the values of the spaces they play in, without making them.
+            return self.score_frontier(maximising_player)
 
         else:   #Otherwise
-            best_score = -500 if maximising_player == self.game.turn else 500
-            for i in range(self.game.COLS):
-                if self.game.valid_move(i):
+            remaining = max_depth - depth
+            safe = None
+            if remaining >= 2:  #Deep enough that a move letting the opponent win next turn is scored as a loss, so only the safe moves need searching.
+                wins, safe = self.game.analyse_threats()
+                if wins or not safe:
+                    return 500 if bool(wins) == (maximising_player == self.game.turn) else -500
+            sign = 1 if maximising_player == Connect4.P1 else -1    #The table holds scores from P1's point of view, so it can be shared by both players.
+            key = self.game.hash    #The canonical form, as Connect4.canonical finds it but without building a tuple.
+            mirrored = self.game.mirror_hash < key
+            if mirrored:
+                key = self.game.mirror_hash
+            entry = self.table.probe(key, mirrored)
+            first = None
+            if entry is not None:
+                entry_depth, score, bound, first = entry
+                if mirrored and first >= 0:
+                    first = self.game.mirror_move(first)
+                if entry_depth >= remaining:    #Searched at least as deep as needed here.
+                    score *= sign
+                    if bound != TranspositionTable.EXACT and sign < 0:
+                        bound = TranspositionTable.LOWER if bound == TranspositionTable.UPPER else TranspositionTable.UPPER
+                    if bound == TranspositionTable.EXACT or (bound == TranspositionTable.LOWER and score >= beta) or (bound == TranspositionTable.UPPER and score <= alpha):
+                        return score
+            original_alpha = alpha
+            original_beta = beta
+            best_move = -1
+            moves = self.order_moves(first) if safe is None else self.order_safe_moves(first, safe)
+            if maximising_player == self.game.turn:
+                best_score = -500
+                for i in moves:
                     self.game.make_move(i)
-                    score = self.minimax(depth+1, max_depth, maximising_player)    #Recursive call, consider as changing turn and making another move
+                    score = self.minimax(depth+1, max_depth, maximising_player, alpha, beta)    #Recursive call, consider as changing turn and making another move
                     self.game.undo_move(i)  #End of recursive call, -1 step.
-                    if maximising_player == self.game.turn:
-                        if score > best_score:
-                            best_score = score
-                            if depth == 0:
-                                self.best_move = i
-                    else:
-                        if score < best_score:
-                            best_score = score
-                            if depth == 0:
-                                self.best_move = i
-                    
+                    if score > best_score:
+                        best_score = score
+                        best_move = i
+                        if score > alpha:
+                            alpha = score
+                            if alpha >= beta:   #The minimising player will never allow this position.
+                                if self.ordering.active:
+                                    self.ordering.cutoff(self.game.moves, self.game.turn, i, i*self.game.H1 + self.game.tot[i], remaining)
+                                break
+            else:
+                best_score = 500
+                for i in moves:
+                    self.game.make_move(i)
+                    score = self.minimax(depth+1, max_depth, maximising_player, alpha, beta)
+                    self.game.undo_move(i)
+                    if score < best_score:
+                        best_score = score
+                        best_move = i
+                        if score < beta:
+                            beta = score
+                            if alpha >= beta:   #The maximising player will never allow this position.
+                                if self.ordering.active:
+                                    self.ordering.cutoff(self.game.moves, self.game.turn, i, i*self.game.H1 + self.game.tot[i], remaining)
+                                break
+            if best_score <= original_alpha:
+                bound = TranspositionTable.UPPER if sign > 0 else TranspositionTable.LOWER
+            elif best_score >= original_beta:
+                bound = TranspositionTable.LOWER if sign > 0 else TranspositionTable.UPPER
+            else:
+                bound = TranspositionTable.EXACT
+            if mirrored and best_move >= 0:
+                best_move = self.game.mirror_move(best_move)
+            self.table.store(key, remaining, best_score * sign, bound, best_move, mirrored)
             return best_score
 
+    def search_root(self, max_depth, maximising_player):
+        """ Searches every move from the current position and assigns the best to best_move, keeping the same choice a full search would make: the leftmost of the best-scoring moves, or the initial random move if every move scores -500 (or 500 when minimising). As moves are no longer tried left to right, a move left of the current best is searched with a window one point wider, so a tie with the best is still detected.
+
+        Args:
+            max_depth (int): The maximum 'depth' at which the Minimax is allowed to explore
+            maximising_player (int): The player whose point of view the Minimax is operating from
+
+        Returns:
+            int: The score of the best move
+        """
+        with self.measure('minimax', max_depth) as stats:
+            self.nodes = 1
+            self.ordering.new_search(self.game.moves)
+            if self.game.game_over() or max_depth == 0:
+                self.nodes = 0
+                score = self.minimax(1, 1, maximising_player)   #Scores the position itself, as the full search would.
+                stats.nodes = self.nodes
+                return score
+            maximising = maximising_player == self.game.turn
+            best_score = -500 if maximising else 500
+            found = False
+            moves = self.order_moves(self.previous_best)
+            if max_depth >= 2:
+                wins, safe = self.game.analyse_threats()
+                if not wins:    #Every winning move would be searched, as a move found to win later could be further left.
+                    moves = self.order_safe_moves(self.previous_best, safe)   #The rest all score as losses, so could never be chosen.
+            for i in moves:
+                tie_breaks = found and i < self.best_move   #Would win a tie against the current best.
+                self.game.make_move(i)
+                if maximising:
+                    score = self.minimax(1, max_depth, maximising_player, best_score - 1 if tie_breaks else best_score, math.inf)
+                else:
+                    score = self.minimax(1, max_depth, maximising_player, -math.inf, best_score + 1 if tie_breaks else best_score)
+                self.game.undo_move(i)
+                better = score > best_score if maximising else score < best_score
+                if better or (tie_breaks and score == best_score):
+                    best_score = score
+                    self.best_move = i
+                    found = True
+            if found:
+                self.previous_best = self.best_move
+            stats.nodes = self.nodes
+            log_config.info(f'Depth {max_depth}: best move {self.best_move} scoring {best_score} after {self.nodes} nodes')
+            return best_score
+
+    def parallel_search(self, max_depth, executor = None, workers = None):
+        """ Searches the current position like minimax(0, max_depth, self.game.turn), but with each move from the root searched in a separate process, assigning the best to best_move. Every root move is searched with a full window, so its exact score is known and the same move is chosen as by the single process search (the leftmost of the best). Searching the moves separately means none can be cut off using another's score, so more nodes are visited in total; the total is stored in nodes.
+
+        Args:
+            max_depth (int): The maximum 'depth' at which the Minimax is allowed to explore
+            executor (object): A ProcessPoolExecutor to run the searches on; if not given, one is created for this search
+            workers (int): The number of processes to create if no executor is given; defaults to one per CPU
+
+        Returns:
+            int: The score of the best move
+        """
+        maximising_player = self.game.turn
+        if self.game.game_over() or max_depth == 0:
+            return self.minimax(0, max_depth, maximising_player)
+        with self.measure('parallel', max_depth) as stats:
+            moves = self.order_moves(self.previous_best)    #Submitted best first, so the longest searches tend to start first.
+            search = partial(search_root_move, self.game.to_bytes(), max_depth, maximising_player, self.threats)
+            if executor is None:
+                from concurrent.futures import ProcessPoolExecutor  #Imported only when needed, as it pulls in multiprocessing, which takes longer to import than the whole engine.
+                with ProcessPoolExecutor(workers) as pool:
+                    results = list(pool.map(search, moves))
+            else:
+                results = list(executor.map(search, moves))
+            best_score = -500
+            found = False
+            self.nodes = 1
+            for move, score, nodes in sorted(results):  #Left to right, as the full search tries them.
+                self.nodes += nodes
+                if score > best_score:
+                    best_score = score
+                    self.best_move = move
+                    found = True
+            if found:
+                self.previous_best = self.best_move
+            stats.nodes = self.nodes
+            log_config.info(f'Parallel depth {max_depth}: best move {self.best_move} scoring {best_score} after {self.nodes} nodes')
+            return best_score
+
+    def iterative_deepening(self, time_limit, max_depth = None):
+        """ Searches the current position to depth 1, then 2, 3 and so on until time_limit runs out, assigning the best move of the deepest completed search to best_move. A search still running when the time is up is abandoned and the game is returned to its position. Each completed depth makes the next one faster, as its best moves are tried first. Stops early if a depth finds a forced result or every empty space has been searched. The depth, nodes, move, score and time of each completed search are stored in iterations.
+
+        Args:
+            time_limit (int): The time allowed for the whole search, in milliseconds
+            max_depth (int): The deepest search to try; if not given, searches until the grid would be full
+
+        Returns:
+            int: The best move found
+        """
+        start = perf_counter()
+        self.deadline = start + time_limit / 1000
+        self.iterations = []
+        start_moves = self.game.moves
+        maximising_player = self.game.turn
+        empty = self.game.COLS * self.game.ROWS - self.game.moves
+        max_depth = empty if max_depth is None else min(max_depth, empty)
+        with self.measure('iterative', 0) as stats:
+            best_move = None
+            searched = 0    #Nodes visited by every depth, including an abandoned one.
+            try:
+                for depth in range(1, max_depth + 1):
+                    self.check_time()   #No point starting a depth once the time is up.
+                    self.next_check = Minimax.CHECK_INTERVAL    #Each search restarts its node count.
+                    score = self.minimax(0, depth, maximising_player)
+                    searched += self.nodes
+                    best_move = self.best_move
+                    elapsed = (perf_counter() - start) * 1000
+                    self.iterations.append({'depth': depth, 'nodes': self.nodes, 'move': best_move, 'score': score, 'time': elapsed})
+                    if abs(score) == 500:   #A forced win or loss; searching deeper won't change it.
+                        break
+            except SearchTimeout:
+                searched += self.nodes
+                while self.game.moves > start_moves:    #Unwinds the moves left on the grid by the abandoned search.
+                    self.game.undo_move(self.game.history[-1])
+            finally:
+                self.next_check = math.inf
+                self.deadline = math.inf
+            stats.nodes = searched
+            stats.depth = len(self.iterations)
+            stats.iterations = self.iterations
+            if best_move is None:   #Not even depth 1 finished, so falls back to the most promising looking move.
+                moves = self.order_moves(self.previous_best)
+                best_move = moves[0] if moves else self.best_move
+        self.best_move = best_move
+        log_config.info(f'Iterative deepening reached depth {len(self.iterations)} in {(perf_counter() - start) * 1000:.0f}ms, best move {best_move}')
+        return best_move
+
+    def search(self, max_depth = None, time_limit = None, book = None, cache = None):
+        """ Finds the best move for the player to move, assigning it to best_move: from the opening book if it has the position, from the search cache if the position was already searched at least max_depth deep, and otherwise by searching to max_depth, or by iterative deepening if a time limit is given. A timed search can't know how deep it would get, so it always searches, but tries the cached move first. New results are stored in the cache. The cache is not used when threats are scored, as its results come from the plain evaluation. Where the move came from, and what finding it cost, is assigned to stats (see measure).
+
+        Args:
+            max_depth (int): The depth to search to; with a time limit, the deepest search to try
+            time_limit (int): The time allowed in milliseconds for an iterative deepening search, or None to search to max_depth
+            book (object): An OpeningBook to play from, or None
+            cache (object): A SearchCache to read and store results in, or None
+
+        Returns:
+            int: The best move found
+        """
+        entry = book.lookup(self.game) if book is not None else None
+        if entry is not None:
+            self.best_move = entry[0]
+            self.stats = SearchStats('book', 0)
+            return self.best_move
+        if self.threats:
+            cache = None
+        entry = cache.lookup(self.game) if cache is not None else None
+        if entry is not None:
+            move, score, depth = entry
+            if time_limit is None and depth >= max_depth:
+                self.best_move = move
+                self.stats = SearchStats('cache', depth)
+                return move
+            self.previous_best = move
+        if time_limit is not None:
+            self.iterative_deepening(time_limit, max_depth)
+            if not self.iterations:
+                return self.best_move
+            score = self.iterations[-1]['score']
+            depth = self.iterations[-1]['depth']
+        else:
+            score = self.minimax(0, max_depth, self.game.turn)
+            depth = max_depth
+        if abs(score) == 500:   #A forced result holds however deep the position is searched.
+            depth = self.game.COLS * self.game.ROWS - self.game.moves
+        if cache is not None and not self.cancelled and self.game.valid_move(self.best_move):
+            cache.store(self.game, self.best_move, score, depth)
+        return self.best_move
+
+    def check_time(self):
+        """ Raises SearchTimeout if the deadline of a timed search has passed or the search has been cancelled, otherwise schedules the next check.
+        """
+        self.next_check = self.nodes + Minimax.CHECK_INTERVAL
+        if self.cancelled or perf_counter() > self.deadline:
+            raise SearchTimeout
+
+    def cancel(self):
+        """ Stops a search running on another thread within a few nodes, by raising SearchTimeout inside it. An untimed search is left part way through, with moves still made on the grid, so should only be cancelled when searching a copy of the game (see BackgroundSearch).
+        """
+        self.cancelled = True
+        self.next_check = 0 #Checks at the very next node, even if the search isn't timed.
+
+    @contextmanager
+    def measure(self, kind, depth):
+        """ Measures a search run inside a with statement, yielding a SearchStats for it to fill in the nodes it visited; the time taken and the transposition table's hits are filled in afterwards. The stats are assigned to stats, and logged as JSON if LOG_STATS is set. If the Minimax was created with profile = True, a SearchProfiler records the details. A search run inside another, such as each depth of iterative deepening, is measured as part of the outer one, and the stats yielded to it are discarded.
+
+        Args:
+            kind (string): The kind of search (see SearchStats)
+            depth (int): The depth being searched to
+
+        Yields:
+            object: The SearchStats of the search
+        """
+        if self.measuring:
+            yield SearchStats(kind, depth)
+            return
+        self.measuring = True
+        stats = SearchStats(kind, depth)
+        profiler = SearchProfiler(self, stats) if self.profile else None
+        table = self.table
+        hits, misses, mirror_hits = table.hits, table.misses, table.mirror_hits
+        start = perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.seconds = perf_counter() - start
+            stats.table_hits = table.hits - hits
+            stats.table_misses = table.misses - misses
+            stats.mirror_hits = table.mirror_hits - mirror_hits
+            if profiler is not None:
+                profiler.remove()
+            self.measuring = False
+            self.stats = stats
+            if Minimax.LOG_STATS:
+                stats.log()
+
+    def order_moves(self, first = None):
+        """ Returns the valid moves in the order they should be searched: moves that win immediately, then the move specified by first, then moves that block an immediate win for the opponent, then every other move from the centre outwards, adjusted by the killer moves and history of earlier cutoffs (see MoveOrdering). Trying the strongest moves first lets alpha-beta pruning cut off the rest sooner.
+
+        Args:
+            first (int): A move to try after any winning moves, usually the best move of a previous search of the same position
+
+        Returns:
+            array: The valid columns, ordered
+        """
+        game = self.game
+        board = game.bitboards[game.turn]
+        opponent_board = game.bitboards[game.P2 if game.turn == game.P1 else game.P1]
+        line_win = game.line_win
+        tot = game.tot
+        rows = game.ROWS
+        moves = []  #Built in place: winning moves, then first and blocks, then the rest.
+        wins = blocks = 0   #Where the winning moves and the blocks end.
+        for i in self.centre_order:
+            if tot[i] != rows:
+                cell = i*game.H1 + tot[i]
+                if line_win(cell, board | 1 << cell):
+                    moves.insert(wins, i)
+                    wins += 1
+                    blocks += 1
+                elif i == first:
+                    moves.insert(wins, i)
+                    blocks += 1
+                elif line_win(cell, opponent_board | 1 << cell):
+                    moves.insert(blocks, i)
+                    blocks += 1
+                else:
+                    moves.append(i)
+        if self.ordering.active and len(moves) - blocks > 1:
+            self.ordering.order(moves, blocks, game)
+        return moves
+
+    def order_safe_moves(self, first, safe):
+        """ Returns the moves in a bitboard of safe moves (see Connect4.analyse_threats) in the order they should be searched: first, then the rest from the centre outwards, adjusted by any killer moves and history (see MoveOrdering). There are no winning moves or blocks to look for, so unlike order_moves no wins need checking.
+
+        Args:
+            first (int): A move to try first, usually the best move of a previous search of the same position
+            safe (int): The bitboard of safe moves
+
+        Returns:
+            array: The safe columns, ordered
+        """
+        masks = self.game.column_masks
+        moves = []
+        start = 0
+        for i in self.centre_order:
+            if safe & masks[i]:
+                if i == first:
+                    moves.insert(0, i)
+                    start = 1
+                else:
+                    moves.append(i)
+        if self.ordering.active and len(moves) - start > 1:
+            self.ordering.order(moves, start, self.game)
+        return moves
+
     def random_move(self):
-        """ Returns a random integer between zero and the number of columns in the grid.
+        """ Returns a random column of the grid.
 
         Returns:
-            int: A random integer between zero and the number of columns in the grid
+            int: A random integer from zero up to, but not including, the number of columns in the grid
         """
-        best_col = random.randint(0, self.game.COLS)
+        best_col = random.randint(0, self.game.COLS - 1)
         return best_col
 
+    def create_weights(self):
+        """ Returns the value of a counter in each space of the grid, flattened row by row the same way as the grid, built once per size of game.
+
+        Returns:
+            array: COLS*ROWS values
+        """
+        game = self.game
+        if game.dimensions not in Minimax.WEIGHTS:
+            Minimax.WEIGHTS[game.dimensions] = [game.weights[col*game.H1 + row] for row in range(game.ROWS) for col in range(game.COLS)]
+        return Minimax.WEIGHTS[game.dimensions]
+
     def evaluation(self, grid, maximising_player):
-        """ Assigns a total positive and negative score to the current grid depending on where the maximising player and opponent's pieces are compared to the values stored within a table.
+        """ Assigns a total positive and negative score to the current grid depending on where the maximising player and opponent's pieces are compared to the values stored within a table (see WEIGHTS).
 
         Args:
             grid (2D Array): The grid of the game object with any number of moves made onto it by the Minimax object
@@ -77,25 +490,62 @@ class Minimax:
         Returns:
             int: The evaluation heuristic of the grid fed into the function from the point of view of the maximising player
         """
-        positions = [
-        [ 3, 4, 5, 7, 5, 4, 3], 
-        [ 4, 6, 8,10, 8, 6, 4], 
-        [ 5, 8,11,13,11, 8, 5], 
-        [ 5, 8,11,13,11, 8, 5],
-        [ 4, 6, 8,10, 8, 6, 4], 
-        [ 3, 4, 5, 7, 5, 4, 3]
-        ]
-        
+        weights = self.weights
         player_score = opponent_score = 0
-
-        positions = [score for row in positions for score in row]
-        grid = [piece for row in grid for piece in row]
-
-        for i in range(len(positions)):
-            if grid[i] == maximising_player:
-                player_score += positions[i]
-            if grid[i] != 0 and grid[i] != maximising_player:
-                opponent_score += positions[i]
+        i = 0
+        for row in grid:
+            for piece in row:
+                if piece == maximising_player:
+                    player_score += weights[i]
+                elif piece != 0:
+                    opponent_score += weights[i]
+                i += 1
             
         return player_score - opponent_score
-    
+
+    def score_frontier(self, maximising_player):
+        """ Returns the score of the move the player to move would choose from the current position, where every move reaches max depth. A move that wins scores as a win; otherwise, as each move adds the value of the space played in to the current score, the best is simply the most valuable space, so no moves are made and no list of scores is built. If the last space is being filled, the move scores as a draw.
+
+        Args:
+            maximising_player (int): The player whose point of view the Minimax is operating from
+
+        Returns:
+            int: The score of the best move for the player to move, from the maximising player's point of view
+        """
+        game = self.game
+        mover = game.turn
+        opponent = Connect4.P2 if maximising_player == Connect4.P1 else Connect4.P1
+        board = game.bitboards[mover]
+        tot = game.tot
+        weights = game.weights
+        rows = game.ROWS
+        best = 0
+        count = 0
+        for i in range(game.COLS):
+            if tot[i] != rows:
+                cell = i*game.H1 + tot[i]
+                if game.line_win(cell, board | 1 << cell):
+                    self.nodes += 1
+                    return 500 if mover == maximising_player else -500
+                count += 1
+                if weights[cell] > best:
+                    best = weights[cell]
+        self.nodes += count
+        if game.moves + 1 == game.COLS * game.ROWS:
+            return 0
+        score = game.scores[maximising_player] - game.scores[opponent]
+        return score + best if mover == maximising_player else score - best
+
+    def threat_score(self, maximising_player):
+        """ Returns the difference between the players' open windows (windows with none of the other player's counters), weighted by THREAT_WEIGHTS so that windows one counter short, which threaten a win, count most. The counts are kept up to date by the game, so nothing is rescanned.
+
+        Args:
+            maximising_player (int): The player whose open windows count as positive
+
+        Returns:
+            int: The weighted difference in open windows
+        """
+        mine = self.game.open_windows[maximising_player]
+        theirs = self.game.open_windows[Connect4.P2 if maximising_player == Connect4.P1 else Connect4.P1]
+        k = self.game.K
+        return Minimax.THREAT_WEIGHTS[0] * (mine[k-1] - theirs[k-1]) + Minimax.THREAT_WEIGHTS[1] * (mine[k-2] - theirs[k-2])
@@ -0,0 +1,198 @@
+from Connect4 import Connect4
+from MinimaxAttempt import Minimax
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from time import perf_counter
+import argparse
+import mmap
+import os
+import struct
+
+
+def search_position(cols, rows, k, depth, history):
+    """ Searches the position reached by a list of moves and returns its book record. It is outside the OpeningBook class so it can be sent to a worker process.
+
+    Args:
+        cols (int): The number of columns in the grid
+        rows (int): The number of rows in the grid
+        k (int): The number of counters in a row needed to win
+        depth (int): The depth to search to
+        history (array): The columns played to reach the position
+
+    Returns:
+        tuple: The hash of the position's canonical form, the best move in that form, the depth searched and the score from the point of view of the player to move
+    """
+    game = Connect4.from_moves(cols, rows, history, K = k)
+    minimax = Minimax(game)
+    score = minimax.minimax(0, depth, game.turn)
+    move = minimax.best_move
+    if not (0 <= move < cols and game.valid_move(move)):    #Every move loses, so the initial random move was kept.
+        move = minimax.order_moves()[0]
+    key, mirrored = game.canonical()
+    return key, game.mirror_move(move) if mirrored else move, depth, score
+
+
+class OpeningBook:
+    """ A read-only table of the best move in every position up to a number of moves into the game, found by deep searches done in advance. The table is a file of fixed-size records sorted by the Zobrist hash of the position's canonical form, so a position and its mirror image share one record; it is memory-mapped rather than read in, so opening it costs nothing however large it is, and a position is found by binary search, reading only the records it passes.
+    """
+    MAGIC = b'C4OB'
+    VERSION = 3 #Version 1 books were keyed on the plain hash, and version 2 books had no K.
+    HEADER = struct.Struct('<4sHBBBI')  #Magic, version, columns, rows, K, number of records.
+    RECORD = struct.Struct('<QbBh') #Hash, best move, depth searched, score.
+    DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'opening_book.bin')
+    OPEN = {}   #Books already opened by this process, by path.
+
+    def __init__(self, path = DEFAULT_PATH):
+        """ Opens and memory-maps a book file, checking its header.
+
+        Args:
+            path (string): The path of the book file
+
+        Raises:
+            ValueError: If the file is not an opening book of this version
+        """
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, version, self.cols, self.rows, self.k, self.count = OpeningBook.HEADER.unpack_from(self.map, 0)
+        if magic != OpeningBook.MAGIC or version != OpeningBook.VERSION or len(self.map) != OpeningBook.HEADER.size + self.count * OpeningBook.RECORD.size:
+            self.close()
+            raise ValueError(f'{path} is not a version {OpeningBook.VERSION} opening book')
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def load(path = DEFAULT_PATH):
+        """ Returns the book at path, opening it only once per process, or None if there is no book there.
+
+        Args:
+            path (string): The path of the book file
+
+        Returns:
+            object: The OpeningBook, or None
+        """
+        if path not in OpeningBook.OPEN:
+            if not os.path.exists(path):
+                return None
+            OpeningBook.OPEN[path] = OpeningBook(path)
+        return OpeningBook.OPEN[path]
+
+    def lookup(self, game):
+        """ Finds the current position of a game in the book.
+
+        Args:
+            game (object): The Connect4 object whose position is looked up
+
+        Returns:
+            tuple: The best move, the depth it was searched to and its score for the player to move, or None if the position is not in the book
+        """
+        if game.dimensions != (self.cols, self.rows, self.k):
+            return None
+        key, mirrored = game.canonical()
+        low = 0
+        high = self.count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            offset = OpeningBook.HEADER.size + middle * OpeningBook.RECORD.size
+            record_key, move, depth, score = OpeningBook.RECORD.unpack_from(self.map, offset)
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle - 1
+            else:
+                self.hits += 1
+                return game.mirror_move(move) if mirrored else move, depth, score
+        self.misses += 1
+        return None
+
+    def close(self):
+        """ Unmaps and closes the book file.
+        """
+        self.map.close()
+        self.file.close()
+        OpeningBook.OPEN.pop(self.path, None)
+
+    @staticmethod
+    def positions(plies, cols = 7, rows = 6, k = 4):
+        """ Returns one list of moves reaching each distinct unfinished position with at most the given number of counters in the grid, counting a position and its mirror image as one.
+
+        Args:
+            plies (int): The largest number of moves into the game to include
+            cols (int): The number of columns in the grid
+            rows (int): The number of rows in the grid
+            k (int): The number of counters in a row needed to win
+
+        Returns:
+            array: Lists of moves, one per position
+        """
+        game = Connect4(cols, rows, k)
+        seen = set()
+        histories = []
+        def explore():
+            key = game.canonical()[0]
+            if game.game_over() or key in seen:
+                return
+            seen.add(key)
+            histories.append(list(game.history))
+            if game.moves < plies:
+                for i in range(cols):
+                    if game.valid_move(i):
+                        game.make_move(i)
+                        explore()
+                        game.undo_move(i)
+        explore()
+        return histories
+
+    @staticmethod
+    def generate(path, plies, depth, cols = 7, rows = 6, workers = 1, k = 4):
+        """ Searches every position up to plies moves into the game to depth and writes the results to a book file, sorted by canonical hash.
+
+        Args:
+            path (string): The path of the book file to write
+            plies (int): The largest number of moves into the game to include
+            depth (int): The depth to search each position to
+            cols (int): The number of columns in the grid
+            rows (int): The number of rows in the grid
+            workers (int): The number of worker processes to search with
+            k (int): The number of counters in a row needed to win
+
+        Returns:
+            int: The number of positions written
+        """
+        histories = OpeningBook.positions(plies, cols, rows, k)
+        search = partial(search_position, cols, rows, k, depth)
+        if workers == 1:
+            records = list(map(search, histories))
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                records = list(pool.map(search, histories, chunksize = 16))
+        records.sort()
+        with open(path, 'wb') as file:
+            file.write(OpeningBook.HEADER.pack(OpeningBook.MAGIC, OpeningBook.VERSION, cols, rows, k, len(records)))
+            for record in records:
+                file.write(OpeningBook.RECORD.pack(*record))
+        return len(records)
+
+
+def main(argv = None):
+    """ Generates an opening book from the command line, e.g. python OpeningBook.py --plies 6 --depth 9 --workers 4
+
+    Args:
+        argv (array): The command line arguments; sys.argv is used if not given
+    """
+    parser = argparse.ArgumentParser(description = 'Searches every Connect 4 position up to a number of moves in and writes an opening book.')
+    parser.add_argument('-p', '--plies', type = int, default = 4, help = 'include positions up to this many moves in (default 4)')
+    parser.add_argument('-d', '--depth', type = int, default = 8, help = 'depth to search each position to (default 8)')
+    parser.add_argument('-w', '--workers', type = int, default = 1, help = 'number of worker processes (default 1)')
+    parser.add_argument('-o', '--output', default = OpeningBook.DEFAULT_PATH, help = 'book file to write (default opening_book.bin next to this file)')
+    parser.add_argument('--cols', type = int, default = 7)
+    parser.add_argument('--rows', type = int, default = 6)
+    parser.add_argument('--k', type = int, default = 4, help = 'counters in a row needed to win (default 4)')
+    args = parser.parse_args(argv)
+    start = perf_counter()
+    count = OpeningBook.generate(args.output, args.plies, args.depth, args.cols, args.rows, args.workers, args.k)
+    print(f'Wrote {count} positions to {args.output} in {perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+from BackgroundSearch import BackgroundSearch
+from MinimaxAttempt import Minimax, SearchTimeout
+from TranspositionTable import TranspositionTable
+from concurrent.futures import wait
+import log_config
+
+
+class Ponder:
+    """ Thinks on the opponent's time. Once the Minimax has moved, it searches the position after each of the opponent's likely replies in turn, on the background search thread, as the Minimax would search it when its turn came. When the opponent's move arrives and its position was searched in full, the move found is played straight away (a ponder hit); otherwise the search starts as normal, but the transposition table it shares with the pondering already holds the positions searched so far.
+
+    The replies are searched in the order the Minimax expects them: first the opponent's best move by a shallow search, then the rest as order_moves would try them. The hits and misses of every move pondered on are counted for the ponder hit rate.
+    """
+    PREDICTION_DEPTH = 4    #The depth of the search that predicts the opponent's best reply.
+
+    def __init__(self, table = None):
+        """ Initialises a Ponder that isn't pondering yet.
+
+        Args:
+            table (object): The TranspositionTable shared by the pondering and the Minimax's own searches; a new one is created if not given
+        """
+        self.table = table if table is not None else TranspositionTable()
+        self.game = None
+        self.history = None #The moves played to reach the position pondered from.
+        self.settings = None
+        self.minimax = None #The Minimax currently pondering.
+        self.future = None
+        self.cancelled = False
+        self.results = {}   #The best move found for each reply searched in full.
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, game, max_depth, time_limit = None, book = None, cache = None):
+        """ Starts pondering on a copy of a game, where the opponent is to move, stopping any pondering already running.
+
+        Args:
+            game (object): The Connect4 object after the Minimax's move
+            max_depth (int): The depth the Minimax will search to, if there is no time limit
+            time_limit (int): The time the Minimax will be allowed in milliseconds, or None to search to max_depth
+            book (object): The OpeningBook the Minimax will play from, or None
+            cache (object): The SearchCache the Minimax will use, or None
+        """
+        self.stop()
+        self.game = game.copy()
+        self.history = list(game.history)
+        self.settings = (max_depth, time_limit, book, cache)
+        self.results = {}
+        self.cancelled = False
+        self.future = BackgroundSearch.executor().submit(self.run)
+
+    def run(self):
+        """ Predicts the opponent's replies and searches the position after each in turn, until every reply has been searched or pondering is stopped. Runs on the search thread.
+        """
+        game = self.game
+        max_depth, time_limit, book, cache = self.settings
+        try:
+            predictor = self.minimax = Minimax(game, self.table)
+            if self.cancelled:
+                return
+            predictor.search(Ponder.PREDICTION_DEPTH)
+            replies = predictor.order_moves(predictor.best_move)
+            for reply in replies:
+                game.make_move(reply)
+                if not game.game_over():
+                    self.minimax = Minimax(game, self.table)
+                    if self.cancelled:  #Checked after the Minimax is set, so stop always finds the one to cancel.
+                        return
+                    move = self.minimax.search(max_depth if time_limit is None else None, time_limit, book, cache)
+                    if self.minimax.cancelled:
+                        return
+                    self.results[reply] = move
+                game.undo_move(reply)
+        except SearchTimeout:   #Stopped part way through an untimed search; the game is only a copy, so is left as it is.
+            return
+
+    def stop(self):
+        """ Stops pondering, without waiting for the search thread to notice.
+        """
+        self.cancelled = True
+        if self.minimax is not None:
+            self.minimax.cancel()
+        if self.future is not None:
+            self.future.cancel()
+
+    def take(self, game, max_depth, time_limit = None, book = None, cache = None):
+        """ Stops pondering now that the opponent has moved, and returns the move found for the position reached if it was searched in full with the same settings, counting a hit or a miss. Waits the moment it takes the search thread to stop, so the table is free for the Minimax's own search.
+
+        Args:
+            game (object): The Connect4 object after the opponent's move
+            max_depth (int): The depth the Minimax is to search to, if there is no time limit
+            time_limit (int): The time the Minimax is allowed in milliseconds, or None to search to max_depth
+            book (object): The OpeningBook the Minimax plays from, or None
+            cache (object): The SearchCache the Minimax uses, or None
+
+        Returns:
+            int: The move to play, or None if the Minimax has to search for itself
+        """
+        if self.future is None:
+            return None
+        self.stop()
+        wait([self.future])
+        self.future = None
+        if game.history[:-1] != self.history or self.settings != (max_depth, time_limit, book, cache):
+            return None #The position or settings changed since pondering started, so it doesn't count either way.
+        move = self.results.get(game.history[-1])
+        if move is not None and game.valid_move(move):
+            self.hits += 1
+            log_config.info(f'Ponder hit on reply {game.history[-1]}: best move {move}, hit rate {self.hit_rate():.0%}')
+            return move
+        self.misses += 1
+        log_config.info(f'Ponder miss on reply {game.history[-1]} ({len(self.results)} replies searched), hit rate {self.hit_rate():.0%}')
+        return None
+
+    def hit_rate(self):
+        """ Returns the share of the opponent's moves whose position had already been searched in full by pondering.
+
+        Returns:
+            double: The ponder hit rate
+        """
+        pondered = self.hits + self.misses
+        return self.hits / pondered if pondered else 0.0
@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class SearchCache:
+    """ A store of search results kept on disk in an SQLite database, so positions searched in one game (or one run of the program) don't have to be searched again in the next. Each position, keyed by the Zobrist hash of its canonical form so that its mirror image shares the entry, holds the best move found, its score for the player to move and the depth searched.
+
+    The database is only opened when first used. Results are held in memory and written in batches, and once the cache holds more than max_entries positions the least recently used are removed. The cache can be shared by several processes and used from a background thread.
+    """
+    DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'search_cache.sqlite3')
+    OPEN = {}   #Caches already opened by this process, by path.
+
+    def __init__(self, path = DEFAULT_PATH, max_entries = 1000000, batch_size = 256):
+        """ Initialises the cache without opening the database.
+
+        Args:
+            path (string): The path of the database file
+            max_entries (int): The most positions to keep
+            batch_size (int): The number of new results to hold before writing them
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.connection = None
+        self.pending = {}   #Results not yet written, by key.
+        self.touched = set()    #Keys looked up since the last write, whose last use needs updating.
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def load(path = DEFAULT_PATH):
+        """ Returns the cache at path, creating only one SearchCache per path in each process.
+
+        Args:
+            path (string): The path of the database file
+
+        Returns:
+            object: The SearchCache
+        """
+        if path not in SearchCache.OPEN:
+            SearchCache.OPEN[path] = SearchCache(path)
+        return SearchCache.OPEN[path]
+
+    def connect(self):
+        """ Opens the database, creating its table if it doesn't exist yet.
+        """
+        self.connection = sqlite3.connect(self.path, timeout = 30, check_same_thread = False)
+        self.connection.execute('PRAGMA journal_mode = WAL')    #Lets other processes read while one writes.
+        self.connection.execute('CREATE TABLE IF NOT EXISTS positions (key INTEGER PRIMARY KEY, move INTEGER, score INTEGER, depth INTEGER, used REAL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS positions_used ON positions (used)')
+        self.connection.commit()
+
+    @staticmethod
+    def key(game):
+        """ Returns the database key of a game's position: the hash of its canonical form, shifted into SQLite's signed 64-bit range, and whether the canonical form is the mirror image.
+
+        Args:
+            game (object): The Connect4 object
+
+        Returns:
+            tuple: The key, and True if moves must be mirrored to and from the stored form
+        """
+        key, mirrored = game.canonical()
+        return key - (1 << 63), mirrored
+
+    def lookup(self, game):
+        """ Finds the stored result for the current position of a game.
+
+        Args:
+            game (object): The Connect4 object whose position is looked up
+
+        Returns:
+            tuple: The best move, its score for the player to move and the depth searched, or None if the position isn't stored
+        """
+        key, mirrored = SearchCache.key(game)
+        with self.lock:
+            entry = self.pending.get(key)
+            if entry is None:
+                if self.connection is None:
+                    self.connect()
+                entry = self.connection.execute('SELECT move, score, depth FROM positions WHERE key = ?', (key,)).fetchone()
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.touched.add(key)
+            move, score, depth = entry
+            return game.mirror_move(move) if mirrored else move, score, depth
+
+    def store(self, game, move, score, depth):
+        """ Records the result of searching the current position of a game, unless a deeper result is already held. Results are written once batch_size have built up.
+
+        Args:
+            game (object): The Connect4 object that was searched
+            move (int): The best move found
+            score (int): The score of the move for the player to move
+            depth (int): The depth searched
+        """
+        key, mirrored = SearchCache.key(game)
+        if mirrored:
+            move = game.mirror_move(move)
+        with self.lock:
+            if key not in self.pending or self.pending[key][2] <= depth:
+                self.pending[key] = (move, score, depth)
+            if len(self.pending) >= self.batch_size:
+                self.write()
+
+    def flush(self):
+        """ Writes every result held in memory to the database.
+        """
+        with self.lock:
+            self.write()
+
+    def write(self):
+        """ Writes the held results and last-use times, then removes the least recently used positions if there are too many. The lock must be held.
+        """
+        if not self.pending and not self.touched:
+            return
+        if self.connection is None:
+            self.connect()
+        now = time.time()
+        with self.connection:
+            self.connection.executemany('INSERT INTO positions VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET move = excluded.move, score = excluded.score, depth = excluded.depth, used = excluded.used WHERE excluded.depth >= positions.depth', [(key, move, score, depth, now) for key, (move, score, depth) in self.pending.items()])
+            self.connection.executemany('UPDATE positions SET used = ? WHERE key = ?', [(now, key) for key in self.touched])
+            excess = self.connection.execute('SELECT COUNT(*) FROM positions').fetchone()[0] - self.max_entries
+            if excess > 0:
+                self.connection.execute('DELETE FROM positions WHERE key IN (SELECT key FROM positions ORDER BY used LIMIT ?)', (excess,))
+        self.pending.clear()
+        self.touched.clear()
+
+    def close(self):
+        """ Writes any held results and closes the database.
+        """
+        self.flush()
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+        SearchCache.OPEN.pop(self.path, None)
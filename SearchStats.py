@@ -0,0 +1,208 @@
+from time import perf_counter
+import math
+import log_config
+
+
+class SearchStats:
+    """ The measurements of one search: how many nodes it visited, how long it took, and how well the transposition table served it. A Minimax created with profile = True also records the nodes at each depth, how often nodes were cut off, and the time spent checking for wins and evaluating positions (see SearchProfiler).
+    """
+
+    def __init__(self, kind, depth):
+        """ Initialises empty measurements.
+
+        Args:
+            kind (string): The kind of search: 'minimax', 'parallel' or 'iterative', 'mcts' for an MCTS, or 'book' or 'cache' for a move found without searching
+            depth (int): The depth searched to (for an iterative search, the deepest completed; for an MCTS, the deepest position added to the tree)
+        """
+        self.kind = kind
+        self.depth = depth
+        self.nodes = 0
+        self.seconds = 0.0
+        self.table_hits = 0
+        self.table_misses = 0
+        self.mirror_hits = 0
+        self.iterations = []
+        self.playouts = 0   #Random games played to the end, by an MCTS.
+        self.reused_playouts = 0    #Playouts through the root left in an MCTS's tree by earlier searches.
+        self.profiled = False
+        self.depth_nodes = []   #Nodes visited at each depth below the root, when profiled. Leaves scored together by Minimax.score_frontier aren't included.
+        self.interior = 0   #Nodes searched move by move (not finished, not at max depth), when profiled.
+        self.cutoffs = 0    #Interior nodes whose score fell outside their alpha-beta window, when profiled.
+        self.leaves = 0
+        self.win_checks = 0
+        self.win_check_seconds = 0.0
+        self.evaluations = 0
+        self.evaluation_seconds = 0.0
+
+    def nodes_per_second(self):
+        """ Returns the rate the search visited nodes at.
+
+        Returns:
+            double: Nodes per second
+        """
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    def playouts_per_second(self):
+        """ Returns the rate an MCTS played random games at.
+
+        Returns:
+            double: Playouts per second
+        """
+        return self.playouts / self.seconds if self.seconds else 0.0
+
+    def branching_factor(self):
+        """ Returns the effective branching factor: the number of moves per position a full-width tree of the same depth would need to have as many nodes as the search visited. Pruning brings it well below the seven moves of a 7x6 grid.
+
+        Returns:
+            double: The effective branching factor
+        """
+        if self.depth <= 0 or self.nodes <= 1:
+            return 0.0
+        return math.exp(math.log(self.nodes) / self.depth)
+
+    def cutoff_rate(self):
+        """ Returns the share of interior nodes cut off by alpha-beta pruning, or by a bound in the transposition table.
+
+        Returns:
+            double: The cutoff rate, or 0 if the search wasn't profiled
+        """
+        return self.cutoffs / self.interior if self.interior else 0.0
+
+    def table_hit_rate(self):
+        """ Returns the share of transposition table probes that found the position.
+
+        Returns:
+            double: The hit rate
+        """
+        probes = self.table_hits + self.table_misses
+        return self.table_hits / probes if probes else 0.0
+
+    def as_dict(self):
+        """ Returns the measurements, and the rates worked out from them, as a dictionary that can be written as JSON.
+
+        Returns:
+            dict: The measurements
+        """
+        stats = {
+            'kind': self.kind,
+            'depth': self.depth,
+            'nodes': self.nodes,
+            'seconds': self.seconds,
+            'nodes_per_second': self.nodes_per_second(),
+            'branching_factor': self.branching_factor(),
+            'table_hits': self.table_hits,
+            'table_misses': self.table_misses,
+            'mirror_hits': self.mirror_hits,
+            'table_hit_rate': self.table_hit_rate(),
+        }
+        if self.iterations:
+            stats['iterations'] = self.iterations
+        if self.playouts:
+            stats.update({
+                'playouts': self.playouts,
+                'playouts_per_second': self.playouts_per_second(),
+                'reused_playouts': self.reused_playouts,
+            })
+        if self.profiled:
+            stats.update({
+                'depth_nodes': self.depth_nodes,
+                'interior': self.interior,
+                'cutoffs': self.cutoffs,
+                'cutoff_rate': self.cutoff_rate(),
+                'leaves': self.leaves,
+                'win_checks': self.win_checks,
+                'win_check_seconds': self.win_check_seconds,
+                'evaluations': self.evaluations,
+                'evaluation_seconds': self.evaluation_seconds,
+            })
+        return stats
+
+    def log(self):
+        """ Writes the measurements to the log as one line of JSON.
+        """
+        import json #Imported only when needed, as stats are rarely logged.
+        log_config.info(json.dumps(self.as_dict()))
+
+
+class SearchProfiler:
+    """ Records the detailed measurements of a SearchStats while a Minimax searches. Rather than the search checking whether it is being profiled at every node, the profiler temporarily replaces the Minimax's and game's methods on those objects alone with versions that measure and then call the original. Searches without a profiler run exactly the same code as before, at the same speed.
+    """
+
+    def __init__(self, minimax, stats):
+        """ Starts profiling a Minimax.
+
+        Args:
+            minimax (object): The Minimax to profile
+            stats (object): The SearchStats to record into
+        """
+        self.minimax = minimax
+        self.game = minimax.game
+        self.stats = stats
+        self.nested = [0.0] #The time spent in timed methods called from within each timed call still running, innermost last.
+        stats.profiled = True
+        self.minimax.minimax = self.node(self.minimax.minimax)
+        for name in ('line_win', 'winning_spaces', 'analyse_threats'):
+            setattr(self.game, name, self.timed(getattr(self.game, name), 'win_checks', 'win_check_seconds'))
+        for name in ('score_frontier', 'threat_score', 'evaluation'):
+            setattr(self.minimax, name, self.timed(getattr(self.minimax, name), 'evaluations', 'evaluation_seconds'))
+
+    def node(self, search):
+        """ Returns a version of Minimax.minimax that counts the nodes at each depth and the cutoffs.
+
+        Args:
+            search (function): The Minimax's own minimax method
+
+        Returns:
+            function: The counting version
+        """
+        stats = self.stats
+        game = self.game
+        def minimax(depth, max_depth, maximising_player, alpha = -math.inf, beta = math.inf):
+            if depth == 0:
+                return search(depth, max_depth, maximising_player, alpha, beta)
+            while len(stats.depth_nodes) < depth:
+                stats.depth_nodes.append(0)
+            stats.depth_nodes[depth - 1] += 1
+            score = search(depth, max_depth, maximising_player, alpha, beta)
+            if depth >= max_depth or game.game_over():
+                stats.leaves += 1
+            else:
+                stats.interior += 1
+                if (score >= beta) if maximising_player == game.turn else (score <= alpha):
+                    stats.cutoffs += 1
+            return score
+        return minimax
+
+    def timed(self, method, count, seconds):
+        """ Returns a version of a method that counts its calls and the time spent in them. Time spent in other timed methods it calls, such as the win checks made while scoring the frontier, is left out, so each is counted once, in the category it was spent in.
+
+        Args:
+            method (function): The bound method to time
+            count (string): The name of the SearchStats counter for calls
+            seconds (string): The name of the SearchStats total for time
+
+        Returns:
+            function: The timing version
+        """
+        stats = self.stats
+        nested = self.nested
+        def timed_method(*args):
+            nested.append(0.0)
+            start = perf_counter()
+            try:
+                return method(*args)
+            finally:    #A search running out of time raises through here.
+                elapsed = perf_counter() - start
+                inner = nested.pop()
+                nested[-1] += elapsed
+                setattr(stats, seconds, getattr(stats, seconds) + elapsed - inner)
+                setattr(stats, count, getattr(stats, count) + 1)
+        return timed_method
+
+    def remove(self):
+        """ Stops profiling, putting back the original methods.
+        """
+        for name in ('minimax', 'score_frontier', 'threat_score', 'evaluation'):
+            del self.minimax.__dict__[name]
+        for name in ('line_win', 'winning_spaces', 'analyse_threats'):
+            del self.game.__dict__[name]
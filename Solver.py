@@ -0,0 +1,274 @@
+from Connect4 import Connect4
+from TranspositionTable import TranspositionTable
+from time import perf_counter
+import argparse
+
+
+class Solver:
+    """ Finds the exact game-theoretic value of a four in a row Connect4 position, assuming perfect play from both sides, rather than the heuristic score of a depth-limited Minimax.
+
+    A position's score is from the point of view of the player to move: 0 for a draw, positive for a win and negative for a loss, larger the sooner the game is won. A player who wins with their last counter scores 1, and each counter to spare adds one. The score of a win for the player to move is (COLS*ROWS + 1 - moves) // 2, where moves is the number of counters in the grid before the winning move.
+
+    The search is negamax with alpha-beta pruning. It works on two integers taken from the game's bitboards: the counters of the player to move and every occupied space. Rather than searching once with a full window, it runs a series of null-window searches, which only ask whether the score is above a guess. These prune far more, and together they narrow down the exact score like a binary search. Moves which hand the opponent an immediate win are never searched, and the rest are tried in order of how many winning spaces they make. Results are kept in a TranspositionTable keyed on the two bitboards.
+    """
+    def __init__(self, cols = 7, rows = 6, table = None):
+        """ Initialises the solver for grids of a size.
+
+        Args:
+            cols (int): The number of columns in the grid
+            rows (int): The number of rows in the grid
+            table (object): A TranspositionTable to keep results in; a new one is created if not given
+        """
+        self.cols = cols
+        self.rows = rows
+        self.H1 = rows + 1
+        self.size = cols * rows
+        self.bottom = sum(1 << col*self.H1 for col in range(cols))  #The lowest space of every column.
+        self.board = self.bottom * ((1 << rows) - 1)    #Every space in the grid, leaving out the sentinels.
+        self.directions = tuple((shift, 2*shift, 3*shift) for shift in (self.H1, self.H1 - 1, self.H1 + 1))
+        self.column_masks = [((1 << rows) - 1) << col*self.H1 for col in range(cols)]
+        centre = (cols - 1) / 2
+        self.order = sorted(range(cols), key = lambda col: abs(col - centre))
+        self.table = table if table is not None else TranspositionTable()
+        self.nodes = 0
+
+    def check_game(self, game):
+        """ Raises ValueError unless a game can be solved by this solver.
+
+        Args:
+            game (object): The Connect4 object
+        """
+        if game.dimensions != (self.cols, self.rows, 4):
+            raise ValueError(f'Can only solve four in a row on a {self.cols}x{self.rows} grid')
+
+    def winning_spaces(self, position, mask):
+        """ Returns every empty space where the player with the counters in position would complete four-in-a-row.
+
+        Args:
+            position (int): The bitboard of the player's counters
+            mask (int): The bitboard of every occupied space
+
+        Returns:
+            int: A bitboard of the winning spaces, including ones not yet playable
+        """
+        wins = (position << 1) & (position << 2) & (position << 3)  #Vertical: only ever on top of three.
+        for shift, double, triple in self.directions:   #Horizontal and both diagonals: the gap can be anywhere in the line.
+            pairs = (position << shift) & (position << double)
+            wins |= pairs & ((position << triple) | (position >> shift))
+            pairs = (position >> shift) & (position >> double)
+            wins |= pairs & ((position << shift) | (position >> triple))
+        return wins & (self.board ^ mask)
+
+    def non_losing_moves(self, position, mask):
+        """ Returns the spaces the player to move can play without letting the opponent win straight away. If the opponent threatens to win, the only such move is to block it, and if they threaten twice there are none.
+
+        Args:
+            position (int): The bitboard of the counters of the player to move
+            mask (int): The bitboard of every occupied space
+
+        Returns:
+            int: A bitboard of the spaces, one per column at most
+        """
+        possible = (mask + self.bottom) & self.board
+        threats = self.winning_spaces(position ^ mask, mask)
+        forced = possible & threats
+        if forced:
+            if forced & (forced - 1):   #Two threats can't both be blocked.
+                return 0
+            possible = forced
+        return possible & ~(threats >> 1)   #Never play directly beneath an opponent's winning space.
+
+    def negamax(self, position, mask, moves, alpha, beta):
+        """ Returns the score of a position if it lies strictly between alpha and beta, otherwise a bound on it beyond the window: at most alpha, or at least beta. The player to move can't win straight away, as the previous move would have blocked the win (see non_losing_moves).
+
+        Args:
+            position (int): The bitboard of the counters of the player to move
+            mask (int): The bitboard of every occupied space
+            moves (int): The number of counters in the grid
+            alpha (int): The score the player to move is already guaranteed
+            beta (int): The score above which the opponent won't allow this position
+
+        Returns:
+            int: The score, or a bound on it
+        """
+        self.nodes += 1
+        possible = self.non_losing_moves(position, mask)
+        if not possible:    #Every move loses on the opponent's next turn.
+            return -((self.size - moves) // 2)
+        if moves >= self.size - 2:  #Neither player can win with the last two counters.
+            return 0
+        low = -((self.size - 2 - moves) // 2)   #The opponent can't win on their next move.
+        if alpha < low:
+            alpha = low
+            if alpha >= beta:
+                return alpha
+        high = (self.size - 1 - moves) // 2 #The player to move can't win on this move.
+        key = position + mask   #Unique to the position, as it adds an extra bit on top of each column.
+        key = (key ^ key >> 30) * 0xBF58476D1CE4E5B9 & 0xFFFFFFFFFFFFFFFF  #Mixed so the table's index bits depend on the whole grid, not just the first columns.
+        key = (key ^ key >> 27) * 0x94D049BB133111EB & 0xFFFFFFFFFFFFFFFF  #Each step can be undone, so keys stay unique.
+        entry = self.table.probe(key)
+        if entry is not None:
+            depth, score, bound, move = entry
+            if bound == TranspositionTable.EXACT:
+                return score
+            if bound == TranspositionTable.LOWER:
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        return alpha
+            elif score < high:
+                high = score
+        if beta > high:
+            beta = high
+            if alpha >= beta:
+                return beta
+        candidates = []
+        for col in self.order:
+            move = possible & self.column_masks[col]
+            if move:
+                candidates.append((-self.winning_spaces(position | move, mask).bit_count(), len(candidates), move))
+        candidates.sort()   #Most winning spaces first, centre first among equals.
+        original_alpha = alpha
+        opponent = position ^ mask
+        for threats, index, move in candidates:
+            score = -self.negamax(opponent, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                self.table.store(key, self.size - moves, score, TranspositionTable.LOWER, -1)
+                return score
+            if score > alpha:
+                alpha = score
+        self.table.store(key, self.size - moves, alpha, TranspositionTable.UPPER if alpha == original_alpha else TranspositionTable.EXACT, -1)
+        return alpha
+
+    def solve(self, game):
+        """ Returns the exact score of a game's current position (see the class description). The game must not be over.
+
+        Args:
+            game (object): The Connect4 object to solve; it is left unchanged
+
+        Returns:
+            int: The score for the player to move
+
+        Raises:
+            ValueError: If the game isn't four in a row on a grid of the solver's size
+        """
+        self.check_game(game)
+        position = game.bitboards[game.turn]
+        mask = game.bitboards[0]
+        return self.solve_boards(position, mask, game.moves)
+
+    def solve_boards(self, position, mask, moves):
+        """ Returns the exact score of the position given by bitboards, narrowing the range of possible scores with null-window searches until only one is left. Each guess is pulled towards zero, as most positions are close to a draw.
+
+        Args:
+            position (int): The bitboard of the counters of the player to move
+            mask (int): The bitboard of every occupied space
+            moves (int): The number of counters in the grid
+
+        Returns:
+            int: The score for the player to move
+        """
+        if self.winning_spaces(position, mask) & (mask + self.bottom) & self.board:
+            return (self.size + 1 - moves) // 2
+        low = -((self.size - moves) // 2)
+        high = (self.size + 1 - moves) // 2
+        while low < high:
+            guess = low + (high - low) // 2
+            if guess <= 0 and int(low / 2) < guess:
+                guess = int(low / 2)
+            elif guess >= 0 and int(high / 2) > guess:
+                guess = int(high / 2)
+            score = self.negamax(position, mask, moves, guess, guess + 1)
+            if score <= guess:
+                high = score
+            else:
+                low = score
+        return low
+
+    def distance(self, score, moves):
+        """ Returns how many more moves the game lasts with perfect play: up to and including the winning move, or until the grid is full for a draw.
+
+        Args:
+            score (int): The score of the position
+            moves (int): The number of counters in the grid
+
+        Returns:
+            int: The number of moves left
+        """
+        if score == 0:
+            return self.size - moves
+        parity = moves % 2 if score > 0 else (moves + 1) % 2    #The winner plays on moves of this parity.
+        winning_move = self.size + 1 - 2*abs(score)
+        if winning_move % 2 != parity:
+            winning_move -= 1
+        return winning_move - moves + 1
+
+    def analyse(self, game):
+        """ Solves every move in a game's current position.
+
+        Args:
+            game (object): The Connect4 object to analyse; it is left unchanged
+
+        Returns:
+            dict: The score for the player to move after each valid column, by column
+
+        Raises:
+            ValueError: If the game isn't four in a row on a grid of the solver's size
+        """
+        self.check_game(game)
+        position = game.bitboards[game.turn]
+        mask = game.bitboards[0]
+        scores = {}
+        for col in self.order:
+            if game.valid_move(col):
+                move = (mask + self.bottom) & self.column_masks[col]
+                if self.winning_spaces(position, mask) & move:
+                    scores[col] = (self.size + 1 - game.moves) // 2
+                else:
+                    scores[col] = -self.solve_boards(position ^ mask, mask | move, game.moves + 1)
+        return scores
+
+    def best_move(self, game):
+        """ Returns a move that achieves the best score in a game's current position, preferring the centre among equals, and the score.
+
+        Args:
+            game (object): The Connect4 object to move in; it is left unchanged
+
+        Returns:
+            tuple: The column to play and its score
+        """
+        scores = self.analyse(game)
+        move = max(scores, key = lambda col: (scores[col], -self.order.index(col)))
+        return move, scores[move]
+
+
+def main(argv = None):
+    """ Solves a position from the command line, e.g. python Solver.py 4453
+
+    Args:
+        argv (array): The command line arguments; sys.argv is used if not given
+    """
+    parser = argparse.ArgumentParser(description = 'Finds the exact value of a Connect 4 position with perfect play.')
+    parser.add_argument('moves', nargs = '?', default = '', help = 'the columns played so far, numbered from 1, e.g. 4453')
+    parser.add_argument('--cols', type = int, default = 7)
+    parser.add_argument('--rows', type = int, default = 6)
+    parser.add_argument('--analyse', action = 'store_true', help = 'solve every move rather than just the position')
+    args = parser.parse_args(argv)
+    try:
+        game = Connect4.from_move_string(args.moves, args.cols, args.rows)
+    except ValueError as error:
+        parser.error(str(error))
+    if game.game_over():
+        parser.error('the game is already over')
+    solver = Solver(args.cols, args.rows)
+    start = perf_counter()
+    score = solver.solve(game)
+    elapsed = perf_counter() - start
+    outcome = 'draw' if score == 0 else 'win' if score > 0 else 'loss'
+    print(f'score {score} ({outcome} for the player to move in {solver.distance(score, game.moves)} moves), {solver.nodes} nodes in {elapsed:.2f}s')
+    if args.analyse:
+        print('  '.join(f'{col + 1}: {score}' for col, score in sorted(solver.analyse(game).items())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+from Connect4 import Connect4, Result
+from GameRecord import GameRecord
+from MCTS import MCTS
+from MinimaxAttempt import Minimax
+from OpeningBook import OpeningBook
+from SearchCache import SearchCache
+from Solver import Solver
+from TranspositionTable import TranspositionTable
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from time import perf_counter
+import argparse
+import json
+import math
+import random
+
+SOLVER_OPENING_DEPTH = 7    #The depth a solver agent searches to before it starts solving.
+
+
+def parse_agent(spec):
+    """ Splits an agent description into its kind and setting. The kinds are 'random', 'minimax:DEPTH', 'threats:DEPTH' (minimax that also scores open twos and threes), 'timed:MILLISECONDS' (iterative deepening within a time limit), 'mcts:MILLISECONDS' (Monte Carlo Tree Search within a time limit) and 'solver:MOVES' (perfect play once MOVES counters are in the grid, and minimax to SOLVER_OPENING_DEPTH before, as solving the opening takes too long).
+
+    Args:
+        spec (string): The agent description, e.g. 'minimax:5'
+
+    Returns:
+        tuple: The kind of agent and its setting as an integer (0 for 'random')
+
+    Raises:
+        ValueError: If the description is not one of the kinds above
+    """
+    kind, _, setting = spec.partition(':')
+    if kind == 'random' and not setting:
+        return kind, 0
+    if kind in ('minimax', 'threats', 'timed', 'mcts', 'solver') and setting.isdigit():
+        return kind, int(setting)
+    raise ValueError(f"Unknown agent '{spec}': expected random, minimax:DEPTH, threats:DEPTH, timed:MILLISECONDS, mcts:MILLISECONDS or solver:MOVES")
+
+
+def choose_move(game, spec, rng, table, book = None, cache = None, mcts = None):
+    """ Returns the move an agent makes in the current position. Like App.min_max_move, an invalid choice from a Minimax falls back to a random move.
+
+    Args:
+        game (object): The Connect4 object to move in; it is left unchanged
+        spec (string): The agent description
+        rng (object): The random.Random used for random moves
+        table (object): The TranspositionTable used by this agent for the game (and by its Solver, whose keys are unrelated)
+        book (object): An OpeningBook for searching agents to play from when it has the position, or None
+        cache (object): A SearchCache for searching agents to reuse and store results in, or None
+        mcts (object): The MCTS of an 'mcts' agent, kept for the whole game so its tree carries over between moves; a new one is made if not given
+
+    Returns:
+        int: The column to play
+    """
+    kind, setting = parse_agent(spec)
+    if kind == 'mcts':
+        mcts = mcts if mcts is not None else MCTS(game)
+        mcts.search(time_limit = setting, book = book)
+        if game.valid_move(mcts.best_move):
+            return mcts.best_move
+        kind = 'random'
+    if kind == 'solver' and game.moves >= setting:
+        return Solver(game.COLS, game.ROWS, table).best_move(game)[0]
+    if kind == 'solver':
+        kind, setting = 'minimax', SOLVER_OPENING_DEPTH
+    if kind != 'random':
+        minimax = Minimax(game, table, threats = kind == 'threats')
+        if kind == 'timed':
+            minimax.search(time_limit = setting, book = book, cache = cache)
+        else:
+            minimax.search(setting, book = book, cache = cache)
+        if game.valid_move(minimax.best_move):
+            return minimax.best_move
+    return rng.choice([i for i in range(game.COLS) if game.valid_move(i)])
+
+
+def play_game(agents, cols, rows, k, book_path, cache_path, index):
+    """ Plays one game between two agents without drawing anything. The agents swap colours every game, and each game's random moves are seeded from its index, so a tournament can be replayed. It is outside any class so it can be sent to a worker process.
+
+    Args:
+        agents (tuple): The descriptions of the two agents
+        cols (int): The number of columns in the grid
+        rows (int): The number of rows in the grid
+        k (int): The number of counters in a row needed to win
+        book_path (string): The path of an opening book for searching agents to use, or None
+        cache_path (string): The path of a search cache for searching agents to use, or None
+        index (int): The number of the game in the tournament
+
+    Returns:
+        dict: The game's record: its index, which agent played each colour, the winning agent (or None) and the time taken, along with its GameRecord (the grid, the moves played as a move string, the time taken for each and the result), so a file of games can be read back with GameRecord.load
+    """
+    start = perf_counter()
+    players = {Connect4.P1: agents[index % 2], Connect4.P2: agents[1 - index % 2]}
+    tables = {player: TranspositionTable(16 if parse_agent(players[player])[0] == 'solver' else 1) for player in players}
+    book = OpeningBook.load(book_path) if book_path is not None else None  #Each worker process maps the file once.
+    cache = SearchCache.load(cache_path) if cache_path is not None else None
+    rng = random.Random(index)
+    random.seed(index)  #Minimax picks its initial move from the global generator.
+    game = Connect4(cols, rows, k)
+    engines = {player: MCTS(game, seed = index) for player in players if parse_agent(players[player])[0] == 'mcts'}
+    record = GameRecord(cols, rows, k, game.turn, players)
+    while not game.game_over():
+        move_start = perf_counter()
+        move = choose_move(game, players[game.turn], rng, tables[game.turn], book, cache, engines.get(game.turn))
+        record.add(move, perf_counter() - move_start)
+        game.make_move(move)
+    record.result = Result(game.result)
+    if cache is not None:
+        cache.flush()   #Every game's results are saved, however the tournament ends.
+    winner = None
+    if game.result == Result.P1WIN:
+        winner = players[Connect4.P1]
+    elif game.result == Result.P2WIN:
+        winner = players[Connect4.P2]
+    return {
+        'game': index,
+        'p1': players[Connect4.P1],
+        'p2': players[Connect4.P2],
+        'winner': winner,
+        'seconds': perf_counter() - start,
+        **record.as_dict(),
+    }
+
+
+def wilson(successes, trials, z = 1.96):
+    """ Returns the Wilson score interval for a proportion, which stays sensible for small samples and for rates near 0 or 1.
+
+    Args:
+        successes (int): The number of successes
+        trials (int): The number of trials
+        z (double): The standard score of the confidence level; 1.96 for 95%
+
+    Returns:
+        tuple: The lower and upper bounds of the interval
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    centre = (p + z*z / (2*trials)) / (1 + z*z / trials)
+    spread = z * math.sqrt(p*(1 - p) / trials + z*z / (4*trials*trials)) / (1 + z*z / trials)
+    return max(0.0, centre - spread), min(1.0, centre + spread)
+
+
+class Tournament:
+    """ Plays a number of games between two agents without the GUI, spread over a pool of worker processes, writing each game's record to a JSONL file as it finishes and keeping a running tally.
+    """
+
+    def __init__(self, agent1, agent2, games, workers = 1, output = None, cols = 7, rows = 6, book = None, cache = None, k = 4):
+        """ Initialises the tournament and checks both agent descriptions.
+
+        Args:
+            agent1 (string): The description of the first agent, who plays P1 in even-numbered games
+            agent2 (string): The description of the second agent
+            games (int): The number of games to play
+            workers (int): The number of worker processes; 1 plays every game in this process
+            output (string): The path of the JSONL file to write game records to, or None
+            cols (int): The number of columns in the grid
+            rows (int): The number of rows in the grid
+            book (string): The path of an opening book for searching agents to use, or None
+            cache (string): The path of a search cache for searching agents to use, or None; it is created if it doesn't exist
+            k (int): The number of counters in a row needed to win
+
+        Raises:
+            ValueError: If an agent description or the book is invalid, or a solver agent is asked to play other than four in a row
+            OSError: If the book can't be opened
+        """
+        for agent in (agent1, agent2):
+            if parse_agent(agent)[0] == 'solver' and k != 4:
+                raise ValueError(f"Agent '{agent}' can only play four in a row")
+        if book is not None:
+            OpeningBook(book).close()   #Fails now, rather than in every game, if the book is missing or invalid.
+        self.agents = (agent1, agent2)
+        self.games = games
+        self.workers = workers
+        self.output = output
+        self.cols = cols
+        self.rows = rows
+        self.k = k
+        self.book = book
+        self.cache = cache
+        self.wins = {agent1: 0, agent2: 0}  #Keyed by description, so an agent against itself pools its wins.
+        self.draws = 0
+        self.played = 0
+        self.elapsed = 0.0
+
+    def results(self):
+        """ Plays the games, yielding each game's record as it finishes (in game order) and updating the tally.
+
+        Yields:
+            dict: The record of each game, as returned by play_game
+        """
+        play = partial(play_game, self.agents, self.cols, self.rows, self.k, self.book, self.cache)
+        start = perf_counter()
+        if self.workers == 1:
+            yield from self.tally(map(play, range(self.games)), start)
+        else:
+            with ProcessPoolExecutor(self.workers) as pool:
+                chunksize = max(1, self.games // (self.workers * 8))    #Large enough to cut messaging, small enough to keep every worker busy to the end.
+                yield from self.tally(pool.map(play, range(self.games), chunksize = chunksize), start)
+
+    def tally(self, records, start):
+        """ Counts the outcome of each record as it arrives.
+
+        Args:
+            records (iterable): Game records
+            start (double): The perf_counter time the tournament started
+
+        Yields:
+            dict: Each record, unchanged
+        """
+        for record in records:
+            if record['winner'] is None:
+                self.draws += 1
+            else:
+                self.wins[record['winner']] += 1
+            self.played += 1
+            self.elapsed = perf_counter() - start
+            yield record
+
+    def run(self):
+        """ Plays every game, streaming the records to the output file if one was given.
+
+        Returns:
+            dict: The summary of the tournament (see summary)
+        """
+        if self.output is None:
+            for record in self.results():
+                pass
+        else:
+            with open(self.output, 'w') as file:
+                for record in self.results():
+                    file.write(json.dumps(record) + '\n')
+                    file.flush()
+        return self.summary()
+
+    def summary(self):
+        """ Returns the results so far: each agent's wins and the draws, as counts and as rates with 95% confidence intervals, the first agent's score (draws count as half a win, as in App.s_final_result), and the games played per second.
+
+        Returns:
+            dict: The summary of the tournament
+        """
+        agent1, agent2 = self.agents
+        summary = {'games': self.played, 'agents': list(self.agents)}
+        if agent1 == agent2:
+            outcomes = (('wins', self.wins[agent1]), ('draws', self.draws))
+        else:
+            outcomes = ((agent1, self.wins[agent1]), (agent2, self.wins[agent2]), ('draws', self.draws))
+        for name, count in outcomes:
+            summary[name] = {'count': count, 'rate': count / self.played if self.played else 0.0, 'interval': wilson(count, self.played)}
+        if agent1 != agent2 and self.played:
+            score = (self.wins[agent1] + self.draws / 2) / self.played
+            spread = 1.96 * math.sqrt(max(score*(1 - score), 0) / self.played)
+            summary['score'] = {'agent': agent1, 'value': score, 'interval': (max(0.0, score - spread), min(1.0, score + spread))}
+        summary['games_per_second'] = self.played / self.elapsed if self.elapsed else 0.0
+        return summary
+
+
+def main(argv = None):
+    """ Runs a tournament from the command line and prints its summary, e.g. python Tournament.py minimax:5 random --games 1000 --workers 4 --output results.jsonl
+
+    Args:
+        argv (array): The command line arguments; sys.argv is used if not given
+    """
+    parser = argparse.ArgumentParser(description = 'Plays Connect 4 agents against each other without the GUI.')
+    parser.add_argument('agent1', help = 'random, minimax:DEPTH, threats:DEPTH, timed:MILLISECONDS, mcts:MILLISECONDS or solver:MOVES')
+    parser.add_argument('agent2', help = 'random, minimax:DEPTH, threats:DEPTH, timed:MILLISECONDS, mcts:MILLISECONDS or solver:MOVES')
+    parser.add_argument('-n', '--games', type = int, default = 100, help = 'number of games to play (default 100)')
+    parser.add_argument('-w', '--workers', type = int, default = 1, help = 'number of worker processes (default 1)')
+    parser.add_argument('-o', '--output', help = 'JSONL file to write each game to')
+    parser.add_argument('--cols', type = int, default = 7)
+    parser.add_argument('--rows', type = int, default = 6)
+    parser.add_argument('--k', type = int, default = 4, help = 'counters in a row needed to win (default 4)')
+    parser.add_argument('--book', help = 'opening book for searching agents to play from (see OpeningBook.py)')
+    parser.add_argument('--cache', help = 'search cache for searching agents to reuse results from, kept between tournaments (created if missing)')
+    args = parser.parse_args(argv)
+    try:
+        tournament = Tournament(args.agent1, args.agent2, args.games, args.workers, args.output, args.cols, args.rows, args.book, args.cache, args.k)
+    except (ValueError, OSError) as error:
+        parser.error(str(error))
+    summary = tournament.run()
+    print(f'{summary["games"]} games in {tournament.elapsed:.1f}s ({summary["games_per_second"]:.1f} games/sec)')
+    for name in summary:
+        if isinstance(summary[name], dict) and 'count' in summary[name]:
+            low, high = summary[name]['interval']
+            print(f'{name:<20}{summary[name]["count"]:>7}  {summary[name]["rate"]:6.1%}  (95% CI {low:.1%} - {high:.1%})')
+    if 'score' in summary:
+        low, high = summary['score']['interval']
+        print(f'score of {summary["score"]["agent"]}: {summary["score"]["value"]:.3f}  (95% CI {low:.3f} - {high:.3f})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+from array import array
+
+
+class TranspositionTable:
+    """ A fixed-size store of previously searched positions, keyed by the Zobrist hash of the grid, so a position reached by a different order of moves does not have to be searched again. Each entry holds the depth it was searched to, its score, whether that score is exact or only a bound, and the best move found.
+
+    Positions are keyed by the hash of their canonical form (see Connect4.canonical), so a position and its mirror image share an entry. Each entry remembers which way round it was stored, so hits found only thanks to the mirror image are counted in mirror_hits.
+
+    Entries are kept in parallel arrays rather than objects, so the memory used is fixed when the table is created. Positions share buckets of two slots: the first keeps whichever position was searched deepest, the second always takes the newest position, so deep results survive while recent ones are still stored.
+    """
+    EXACT = 0
+    LOWER = 1   #The score is at least this value (the search was cut off).
+    UPPER = 2   #The score is at most this value (no move beat alpha).
+    MIRRORED = 4    #Set alongside the bound when the entry was stored from the mirror image of its canonical form.
+    ENTRY_BYTES = 13    #8 (key) + 2 (score) + 1 (depth) + 1 (bound) + 1 (move)
+
+    def __init__(self, megabytes = 8):
+        """ Initialises an empty table using no more than the given memory. The number of buckets is rounded down to a power of two so a hash can be turned into an index with a single AND.
+
+        Args:
+            megabytes (double): The maximum memory the entries may use
+        """
+        buckets = 1
+        while buckets * 4 * TranspositionTable.ENTRY_BYTES <= megabytes * 1024 * 1024:
+            buckets *= 2
+        self.index_mask = buckets - 1
+        slots = 2 * buckets
+        self.keys = array('Q', [0]) * slots
+        self.scores = array('h', [0]) * slots
+        self.depths = array('b', [-1]) * slots  #A depth of -1 marks an empty slot.
+        self.bounds = array('B', [0]) * slots
+        self.moves = array('b', [-1]) * slots
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.mirror_hits = 0    #Hits on an entry stored from the other orientation, which a table keyed on the plain hash would have missed.
+
+    def probe(self, key, mirrored = False):
+        """ Looks up a position in the table.
+
+        Args:
+            key (int): The Zobrist hash of the position
+            mirrored (boolean): Whether key is the hash of the position's mirror image
+
+        Returns:
+            tuple: The depth, score, bound and best move stored for the position, or None if it is not stored
+        """
+        slot = (key & self.index_mask) << 1
+        if self.keys[slot] != key or self.depths[slot] < 0:
+            slot += 1
+            if self.keys[slot] != key or self.depths[slot] < 0:
+                self.misses += 1
+                return None
+        self.hits += 1
+        bound = self.bounds[slot]
+        if (bound & TranspositionTable.MIRRORED) != (TranspositionTable.MIRRORED if mirrored else 0):
+            self.mirror_hits += 1
+        return self.depths[slot], self.scores[slot], bound & ~TranspositionTable.MIRRORED, self.moves[slot]
+
+    def store(self, key, depth, score, bound, move, mirrored = False):
+        """ Stores the result of searching a position. It goes in the bucket's depth-preferred slot if it was searched at least as deep as the position already there (or is that position), otherwise in the always-replace slot. Overwriting a different position counts as a collision.
+
+        Args:
+            key (int): The Zobrist hash of the position
+            depth (int): How many moves deep the position was searched
+            score (int): The score found for the position
+            bound (int): EXACT, LOWER or UPPER, describing what the score means
+            move (int): The best move found, or -1 if there was none
+            mirrored (boolean): Whether key is the hash of the position's mirror image
+        """
+        slot = (key & self.index_mask) << 1
+        if depth < self.depths[slot] and self.keys[slot] != key:
+            slot += 1
+        if self.depths[slot] >= 0 and self.keys[slot] != key:
+            self.collisions += 1
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.scores[slot] = score
+        self.bounds[slot] = bound | TranspositionTable.MIRRORED if mirrored else bound
+        self.moves[slot] = move
+
+    def clear(self):
+        """ Empties the table and resets its counters.
+        """
+        self.depths = array('b', [-1]) * len(self.depths)
+        self.hits = self.misses = self.collisions = self.mirror_hits = 0
+
+    def stats(self):
+        """ Returns the table's counters.
+
+        Returns:
+            dict: The number of hits, misses, collisions and mirror hits, the hit rate, the share of the hit rate owed to mirror hits, and the fraction of slots in use
+        """
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'mirror_hits': self.mirror_hits,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'mirror_hit_rate': self.mirror_hits / probes if probes else 0.0,
+            'fill': 1 - self.depths.count(-1) / len(self.depths),
+        }
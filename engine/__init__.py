@@ -0,0 +1,54 @@
+""" The Connect4 engine without the GUI: the game, its searches, and what they use, importable as one package for worker processes, command line tools and other programs, e.g. from engine import Connect4, Minimax
+
+Nothing is imported until it is first used, so importing the package costs next to nothing, and using the game alone never imports the searches. Importing has no side effects: nothing is logged or written unless log_config.configure is called, and Tk is never imported. The engine's modules stay where they are, next to the package, so the GUI and the scripts import them as before.
+
+Run python -m engine to find the best move in a position from the command line (see engine/__main__.py).
+"""
+import importlib
+
+EXPORTS = { #The module each name is imported from.
+    'Connect4': 'Connect4',
+    'Result': 'Connect4',
+    'Minimax': 'MinimaxAttempt',
+    'SearchTimeout': 'MinimaxAttempt',
+    'MCTS': 'MCTS',
+    'Solver': 'Solver',
+    'TranspositionTable': 'TranspositionTable',
+    'MoveOrdering': 'MoveOrdering',
+    'SearchStats': 'SearchStats',
+    'GameRecord': 'GameRecord',
+    'OpeningBook': 'OpeningBook',
+    'SearchCache': 'SearchCache',
+    'BackgroundSearch': 'BackgroundSearch',
+    'Ponder': 'Ponder',
+}
+
+__all__ = list(EXPORTS)
+
+
+def __getattr__(name):
+    """ Imports a name from its module the first time it is used, and keeps it in the package so later uses cost nothing.
+
+    Args:
+        name (string): The name being looked up
+
+    Returns:
+        object: The class or function
+
+    Raises:
+        AttributeError: If the name isn't one the package exports
+    """
+    if name not in EXPORTS:
+        raise AttributeError(f"module 'engine' has no attribute '{name}'")
+    value = getattr(importlib.import_module(EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """ Lists the names the package exports, including those not yet imported.
+
+    Returns:
+        array: The names
+    """
+    return sorted(set(globals()) | set(EXPORTS))
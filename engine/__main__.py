@@ -0,0 +1,88 @@
+""" Finds the best move in a position from the command line, without the GUI, e.g. python -m engine 4453 --time 500
+"""
+from time import perf_counter
+import argparse
+import json
+
+from engine import Connect4, Result
+
+
+def best_move(game, engine = 'minimax', depth = 7, time_limit = None, playouts = None):
+    """ Finds the best move for the player to move in a game with one of the engines, and what finding it cost.
+
+    Args:
+        game (object): The Connect4 object to move in; it is left unchanged
+        engine (string): The engine to search with: minimax, mcts or solver
+        depth (int): The depth a Minimax searches to; with a time limit, the deepest it tries
+        time_limit (int): The time allowed in milliseconds, or None to search to depth (Minimax) or run playouts (MCTS)
+        playouts (int): The playouts an MCTS runs without a time limit, or None for its default
+
+    Returns:
+        dict: The move (numbered from 0), the engine, the seconds taken and the engine's own measurements
+    """
+    game = game.copy()
+    start = perf_counter()
+    if engine == 'solver':
+        from engine import Solver
+        solver = Solver(game.COLS, game.ROWS)
+        move, score = solver.best_move(game)
+        details = {'score': score, 'nodes': solver.nodes}
+    elif engine == 'mcts':
+        from engine import MCTS
+        mcts = MCTS(game)
+        move = mcts.search(playouts, time_limit)
+        details = mcts.stats.as_dict()
+    else:
+        from engine import Minimax
+        minimax = Minimax(game)
+        move = minimax.search(depth, time_limit)
+        if not game.valid_move(move):   #Every move loses, so the search never replaced its random first guess.
+            move = minimax.order_moves()[0]
+        details = minimax.stats.as_dict() if minimax.stats is not None else {}
+    return {'move': move, 'engine': engine, 'seconds': perf_counter() - start, **details}
+
+
+def main(argv = None):
+    """ Prints the best move in the position given on the command line, numbered from 1.
+
+    Args:
+        argv (array): The command line arguments; sys.argv is used if not given
+    """
+    parser = argparse.ArgumentParser(prog = 'python -m engine', description = 'Finds the best Connect 4 move in a position.')
+    parser.add_argument('moves', nargs = '?', default = '', help = 'the columns played so far, numbered from 1, e.g. 4453')
+    parser.add_argument('--engine', choices = ('minimax', 'mcts', 'solver'), default = 'minimax')
+    parser.add_argument('--depth', type = int, default = 7, help = 'the depth a minimax searches to, or with --time the deepest it tries (default 7)')
+    parser.add_argument('--time', type = int, help = 'the time allowed in milliseconds, for minimax and mcts')
+    parser.add_argument('--playouts', type = int, help = 'the playouts mcts runs without a time limit')
+    parser.add_argument('--cols', type = int, default = 7)
+    parser.add_argument('--rows', type = int, default = 6)
+    parser.add_argument('--k', type = int, default = 4, help = 'the number of counters in a row needed to win')
+    parser.add_argument('--json', action = 'store_true', help = 'print the result as one line of JSON')
+    args = parser.parse_args(argv)
+    try:
+        game = Connect4.from_move_string(args.moves, args.cols, args.rows, K = args.k)
+    except ValueError as error:
+        parser.error(str(error))
+    if game.game_over():
+        parser.error(f'the game is already over ({Result(game.result).name})')
+    if args.engine == 'solver' and args.k != 4:
+        parser.error('the solver only plays four in a row')
+    result = best_move(game, args.engine, args.depth, args.time, args.playouts)
+    result['move'] += 1
+    if args.json:
+        print(json.dumps(result))
+        return
+    details = [f'{result["seconds"] * 1000:.0f}ms']
+    if 'score' in result:
+        details.append(f'score {result["score"]}')
+    if result.get('depth'):
+        details.append(f'depth {result["depth"]}')
+    if result.get('playouts'):
+        details.append(f'{result["playouts"]} playouts')
+    elif result.get('nodes'):
+        details.append(f'{result["nodes"]} nodes')
+    print(f'{result["move"]} ({", ".join(details)})')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,25 @@
-import logging
 import os
-directory = os.path.dirname(__file__)
-logging.basicConfig(filename = directory + '/log.txt', format = '%(asctime)s %(module)s %(funcName)s - %(message)s', level = logging.INFO, filemode = 'w')
+import sys
+
+LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'log.txt')
+
+
+def configure(path = LOG_PATH):
+    """ Sends the log to a file, emptying it first. Only programs that want a log, such as the GUI, call this; importing the engine leaves logging unconfigured, so nothing is written and no file is touched.
+
+    Args:
+        path (string): The path of the log file
+    """
+    import logging
+    logging.basicConfig(filename = path, format = '%(asctime)s %(module)s %(funcName)s - %(message)s', level = logging.INFO, filemode = 'w')
+
+
+def info(message):
+    """ Writes a message to the log, naming the function that called this as its source. If nothing has imported the logging module, there can be no log to write to, so the message is dropped without importing it, as that takes longer than importing the engine itself. The root logger is used directly, which, unlike logging.info, never configures logging as a side effect.
+
+    Args:
+        message (string): The message to log
+    """
+    logging = sys.modules.get('logging')
+    if logging is not None:
+        logging.getLogger().info(message, stacklevel = 2)